@@ -1,13 +1,16 @@
 from rest_framework.response    import Response
 from rest_framework.views       import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 
 from apps.accounts.serializers import CreateUserSerializer, MyTokenObtainPairSerializer
+from apps.shop.guest_cart      import guest_cart
 
 
 class RegisterAPIView(APIView):
     """ Registration Endpoint """
     serializer_class = CreateUserSerializer
+    throttle_scope = 'register'
 
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
@@ -19,4 +22,16 @@ class RegisterAPIView(APIView):
 
 
 class MyTokenObtainPairView(TokenObtainPairView):
+    """ Login; the guest cart from the cookie is merged into the user's cart """
     serializer_class = MyTokenObtainPairSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+
+        response = Response(serializer.validated_data, status=200)
+        guest_cart.merge(request, response, serializer.user)
+        return response
@@ -0,0 +1,30 @@
+from django.conf        import settings
+from django.core.checks import Error, Tags, register
+
+from apps.common import idempotency
+
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches)
+def check_idempotency_cache(app_configs, **kwargs):
+    """ Idempotency locks and stored responses must be seen by every worker """
+    config = settings.CACHES.get(idempotency.ALIAS)
+    if config is None:
+        return [Error(
+            f"CACHES['{idempotency.ALIAS}'] is not configured.",
+            hint="Configure a cache shared by all workers (Redis, Memcached, DatabaseCache).",
+            id='common.E001',
+        )]
+    if config.get('BACKEND') in PROCESS_LOCAL_CACHES:
+        return [Error(
+            f"CACHES['{idempotency.ALIAS}'] uses {config['BACKEND']}, which is per-process.",
+            hint="Duplicates of a request sent to another worker would run again. "
+                 "Use Redis, Memcached or DatabaseCache.",
+            id='common.E002',
+        )]
+    return []
@@ -0,0 +1,104 @@
+import gzip
+import hashlib
+
+from django.conf        import settings
+from django.core.cache  import cache
+
+
+# Кодеки Content-Encoding: name -> compress(body, level). gzip есть всегда, brotli и zstd
+# подключаются, если установлены пакеты `brotli` / `zstandard`; свой кодек — register().
+
+codecs = {}
+
+
+def register(name, compress):
+    codecs[name] = compress
+
+
+register('gzip', lambda body, level: gzip.compress(body, compresslevel=level, mtime=0))
+
+try:
+    import brotli
+except ImportError:
+    pass
+else:
+    register('br', lambda body, level: brotli.compress(body, quality=level))
+
+try:
+    import zstandard
+except ImportError:
+    pass
+else:
+    register('zstd', lambda body, level: zstandard.ZstdCompressor(level=level).compress(body))
+
+
+DEFAULT_LEVELS = {'gzip': 6, 'br': 5, 'zstd': 3}
+
+
+def available_encodings():
+    """ Server preference order from COMPRESSION_ENCODINGS, only installed codecs """
+    return [name for name in getattr(settings, 'COMPRESSION_ENCODINGS', ['zstd', 'br', 'gzip']) if name in codecs]
+
+
+def parse_accept_encoding(header):
+    """ 'gzip;q=0.8, br' -> {'gzip': 0.8, 'br': 1.0} """
+    weights = {}
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name] = weight
+    return weights
+
+
+def accepts(header, encoding):
+    """ Whether the client accepts `encoding` (q > 0, directly or via '*') """
+    weights = parse_accept_encoding(header)
+    return weights.get(encoding, weights.get('*', 0.0)) > 0
+
+
+def negotiate(header):
+    """ Best encoding the client accepts (highest q, then server preference) or None """
+    if not header:
+        return None
+    weights = parse_accept_encoding(header)
+    best, best_weight = None, 0.0
+    for name in available_encodings():
+        weight = weights.get(name, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = name, weight
+    return best
+
+
+def compress(body, encoding):
+    level = getattr(settings, 'COMPRESSION_LEVELS', {}).get(encoding, DEFAULT_LEVELS.get(encoding))
+    return codecs[encoding](body, level)
+
+
+def cache_compressed(response, cache_key, timeout):
+    """ Marks a response built from cached data: CompressionMiddleware keeps its compressed bytes in the cache """
+    if timeout:
+        response.compressed_cache_key = cache_key
+        response.compressed_cache_timeout = timeout
+    return response
+
+
+def compress_cached(body, encoding, cache_key, timeout):
+    """
+    Compressed body stored next to a catalog cache entry. Ключ включает хэш несжатого тела,
+    поэтому после изменения данных старые байты просто перестают находиться — отдельная инвалидация не нужна.
+    """
+    key = f"{cache_key}:{encoding}:{hashlib.blake2b(body, digest_size=16).hexdigest()}"
+    compressed = cache.get(key)
+    if compressed is None:
+        compressed = compress(body, encoding)
+        cache.set(key, compressed, timeout)
+    return compressed
@@ -0,0 +1,96 @@
+import json
+import time
+import hashlib
+import functools
+
+from django.conf        import settings
+from django.core.cache  import caches
+from rest_framework.response import Response
+
+
+# Idempotency-Key для небезопасных методов: первый ответ сохраняется в кэше на IDEMPOTENCY_TTL,
+# повтор с тем же ключом получает его без выполнения view. Параллельный дубль ждет, пока первый
+# запрос допишет ответ (блокировка — cache.add), поэтому кэш — общий для воркеров CACHES['idempotency'],
+# см. проверку common.E002.
+
+ALIAS = 'idempotency'
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05
+
+
+def cache_key(request, view, key):
+    scope = f"{request.user.pk}:{type(view).__name__}:{request.method}:{key}"
+    return 'idempotency_' + hashlib.sha256(scope.encode()).hexdigest()
+
+
+def fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def replay(entry):
+    return Response(data=entry['data'], status=entry['status'], headers={'Idempotent-Replayed': 'true'})
+
+
+def get_cache():
+    return caches[ALIAS]
+
+
+def wait_for(key, timeout):
+    cache = get_cache()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is None or entry['state'] == 'done':
+            return entry
+    return cache.get(key)
+
+
+def idempotent(method):
+    """
+    View method decorator. Ключ действует в пределах пользователя, view и метода;
+    анонимные запросы и запросы без заголовка выполняются как обычно. Ответы 5xx не сохраняются —
+    такой запрос можно повторить с тем же ключом.
+    """
+    @functools.wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key or not request.user.is_authenticated:
+            return method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response({'message': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'}, status=400)
+
+        cache = get_cache()
+        key = cache_key(request, self, key)
+        digest = fingerprint(request)
+        running = {'state': 'running', 'fingerprint': digest}
+        while not cache.add(key, running, getattr(settings, 'IDEMPOTENCY_LOCK_TIMEOUT', 30)):
+            entry = cache.get(key)
+            if entry is not None and entry['fingerprint'] != digest:
+                return Response({'message': f'{HEADER} was already used with a different request body'}, status=422)
+            if entry is not None and entry['state'] == 'running':
+                entry = wait_for(key, getattr(settings, 'IDEMPOTENCY_WAIT', 10))
+            if entry is None:
+                continue  # первый запрос упал или истекла блокировка — пробуем выполнить сами
+            if entry['state'] == 'done':
+                return replay(entry)
+            return Response({'message': 'A request with this Idempotency-Key is still being processed'}, status=409)
+
+        try:
+            response = method(self, request, *args, **kwargs)
+        except BaseException:
+            cache.delete(key)
+            raise
+        if response.status_code >= 500:
+            cache.delete(key)
+        else:
+            cache.set(key, {
+                'state': 'done',
+                'fingerprint': digest,
+                'status': response.status_code,
+                'data': response.data,
+            }, getattr(settings, 'IDEMPOTENCY_TTL', 60 * 60 * 24))
+        return response
+    return wrapper
@@ -0,0 +1,92 @@
+import time
+from datetime import timedelta
+
+from django.apps                    import apps
+from django.conf                    import settings
+from django.core                    import serializers
+from django.core.management.base    import BaseCommand, CommandError
+from django.db                      import transaction
+from django.db.models.deletion      import Collector
+from django.utils                   import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from apps.common.models import ArchivedRecord
+
+
+# Порядок важен: сначала зависимые модели. exclude — строки, удаление которых
+# каскадом снесло бы живые данные (история заказов) или обнулило бы ссылки на них:
+# с User каскадом удаляется Seller, а Product.seller — SET_NULL, поэтому пользователь
+# архивируется только когда у его магазина не осталось товаров (в т.ч. еще не заархивированных).
+ARCHIVED_MODELS = [
+    ('shop.Review', []),
+    ('shop.Product', [{'orderitem__order__isnull': False}]),
+    ('accounts.User', [{'orders__isnull': False}, {'seller__products__isnull': False}]),
+]
+
+
+class Command(BaseCommand):
+    help = ("Moves soft-deleted rows older than the retention window into ArchivedRecord "
+            "and purges expired JWT outstanding/blacklisted tokens. Safe to interrupt and rerun.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=getattr(settings, 'ARCHIVE_RETENTION_DAYS', 30))
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--pause', type=float, default=0.1,
+                            help="Seconds to sleep between batches so other writers can take the lock")
+
+    def handle(self, *args, **options):
+        retention = getattr(settings, 'ARCHIVE_RETENTION_DAYS', 30)
+        if options['days'] < retention:
+            # лента /shop/changes/ не проверяет архив для курсоров моложе ARCHIVE_RETENTION_DAYS
+            raise CommandError(f"--days must be at least ARCHIVE_RETENTION_DAYS ({retention}), lower the setting instead")
+        cutoff = timezone.now() - timedelta(days=options['days'])
+
+        for label, excludes in ARCHIVED_MODELS:
+            model = apps.get_model(label)
+            queryset = model._base_manager.filter(is_deleted=True, deleted_at__lt=cutoff)
+            for exclude in excludes:
+                queryset = queryset.exclude(**exclude)
+            self.run_batches(label, queryset, options, self.archive_batch)
+
+        queryset = OutstandingToken.objects.filter(expires_at__lt=timezone.now())
+        self.run_batches('expired tokens', queryset, options, self.purge_batch)
+
+    def run_batches(self, label, queryset, options, process):
+        moved = 0
+        started = time.perf_counter()
+        while True:
+            ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            # каждая пачка — отдельная короткая транзакция, прерванный запуск просто продолжится
+            with transaction.atomic():
+                moved += process(queryset.model, ids)
+            time.sleep(options['pause'])
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{label}: {moved} rows in {elapsed:.1f}s ({moved / elapsed if elapsed else 0:.0f} rows/s)")
+
+    def archive_batch(self, model, ids):
+        collector = Collector(using=model._base_manager.db)
+        collector.collect(list(model._base_manager.filter(pk__in=ids)))
+
+        instances = [obj for objs in collector.data.values() for obj in objs]
+        for queryset in collector.fast_deletes:
+            instances.extend(queryset)
+
+        ArchivedRecord.objects.bulk_create([
+            ArchivedRecord(
+                model=obj._meta.label,
+                object_id=str(obj.pk),
+                data=serializers.serialize('python', [obj])[0]['fields'],
+                deleted_at=getattr(obj, 'deleted_at', None),
+            )
+            for obj in instances
+        ], ignore_conflicts=True)
+        collector.delete()
+        return len(instances)
+
+    def purge_batch(self, model, ids):
+        # BlacklistedToken удаляется каскадом
+        model.objects.filter(pk__in=ids).delete()
+        return len(ids)
@@ -0,0 +1,67 @@
+import json
+import time
+import random
+import string
+
+from django.core.management.base import BaseCommand
+
+from apps.common import compression
+
+
+def sample_products(count):
+    """ Payload shaped like a ProductsView page """
+    words = [''.join(random.choices(string.ascii_lowercase, k=random.randint(3, 9))) for _ in range(500)]
+    sellers = [{'name': f"Shop {i}", 'slug': f"shop-{i}", 'avatar': 'avatars/default.jpg'} for i in range(20)]
+    categories = [{'name': f"Category {i}", 'slug': f"category-{i}", 'image': f"/media/category_images/{i}.jpg"}
+                  for i in range(10)]
+    results = []
+    for i in range(count):
+        name = ' '.join(random.choices(words, k=3))
+        slug = name.replace(' ', '-')
+        results.append({
+            'seller': random.choice(sellers),
+            'name': name,
+            'rating': round(random.uniform(0, 5), 1),
+            'slug': slug,
+            'desc': ' '.join(random.choices(words, k=40)),
+            'price_old': None,
+            'price_current': f"{random.randint(100, 100000) / 100:.2f}",
+            'category': random.choice(categories),
+            'in_stock': random.randint(0, 50),
+            'image1': f"/media/product_images/{slug}-1.jpg",
+            'image2': None,
+            'image3': None,
+        })
+    return {'count': count * 10, 'next': 'http://example.com/shop/products/?page=2', 'previous': None, 'results': results}
+
+
+class Command(BaseCommand):
+    help = "Compares response size and compression CPU time per codec and level on a product list payload"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100, help="Products per response (page size)")
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        body = json.dumps(sample_products(options['products'])).encode()
+        self.stdout.write(f"Installed codecs: {', '.join(compression.codecs)}")
+        self.stdout.write(f"Uncompressed: {len(body)} bytes")
+        self.stdout.write(f"{'codec':<6} {'level':>5} {'bytes':>9} {'ratio':>6} {'ms/resp':>8} {'MB/s':>7}")
+        levels = {'gzip': (1, 6, 9), 'br': (1, 5, 11), 'zstd': (1, 3, 19)}
+        for name, compress in compression.codecs.items():
+            for level in levels.get(name, (None,)):
+                repeat = max(1, options['repeat'] // 10) if level and level > 9 else options['repeat']
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    compressed = compress(body, level)
+                elapsed = (time.perf_counter() - started) / repeat
+                self.stdout.write(
+                    f"{name:<6} {level!s:>5} {len(compressed):>9} {len(body) / len(compressed):>6.1f} "
+                    f"{elapsed * 1000:>8.2f} {len(body) / elapsed / 1e6:>7.1f}"
+                )
+        self.stdout.write("Cached compressed body (hit): one cache read + blake2b of the body, no compression")
+        started = time.perf_counter()
+        for _ in range(options['repeat']):
+            compression.compress_cached(body, 'gzip', 'bench_compression', 60)
+        elapsed = (time.perf_counter() - started) / options['repeat']
+        self.stdout.write(f"{'cached':<6} {'gzip':>5} {'':>9} {'':>6} {elapsed * 1000:>8.2f}")
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base    import BaseCommand
+from django.http                    import HttpResponse
+from django.test                    import RequestFactory
+from django.urls                    import resolve
+
+from apps.common.middleware import MetricsMiddleware
+
+
+class Command(BaseCommand):
+    help = "Measures per-request overhead of MetricsMiddleware"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/shop/products/')
+        request.resolver_match = resolve('/shop/products/')
+        response = HttpResponse()
+
+        def view(request):
+            return response
+
+        middleware = MetricsMiddleware(view)
+        for label, handler in (('bare', view), ('metrics', middleware)):
+            started = time.perf_counter()
+            for _ in range(options['requests']):
+                handler(request)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"{label:<8} {elapsed / options['requests'] * 1e6:8.2f} us/request")
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base    import BaseCommand
+from django.core.cache.backends.locmem import LocMemCache
+from django.contrib.auth.models     import AnonymousUser
+from rest_framework.test            import APIRequestFactory
+from rest_framework.request         import Request
+from rest_framework.throttling      import AnonRateThrottle
+
+from apps.common.throttling import AnonTokenBucketThrottle
+
+
+class Command(BaseCommand):
+    help = "Measures per-request overhead of DRF AnonRateThrottle vs AnonTokenBucketThrottle"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+        parser.add_argument('--clients', type=int, default=10)
+        parser.add_argument('--rate', default='100000/hour')
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        requests = []
+        for i in range(options['clients']):
+            request = Request(factory.get('/', REMOTE_ADDR=f'10.0.0.{i}'))
+            request.user = AnonymousUser()
+            requests.append(request)
+
+        for throttle_class in (AnonRateThrottle, AnonTokenBucketThrottle):
+            # свой LocMem: clear() общего кэша стер бы корзины, ключи идемпотентности и т.д.
+            cache = LocMemCache('bench_throttle', {'OPTIONS': {'MAX_ENTRIES': options['clients'] * 2}})
+            throttle_class = type(throttle_class.__name__, (throttle_class,), {'rate': options['rate'], 'cache': cache})
+            started = time.perf_counter()
+            for i in range(options['requests']):
+                throttle_class().allow_request(requests[i % len(requests)], None)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{throttle_class.__name__:<24} {elapsed / options['requests'] * 1e6:8.1f} us/request"
+            )
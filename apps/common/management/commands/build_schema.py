@@ -0,0 +1,16 @@
+import time
+
+from django.conf                    import settings
+from django.core.management.base    import BaseCommand
+
+from apps.common import schema
+
+
+class Command(BaseCommand):
+    help = "Generates the OpenAPI schema served at /api/schema/ (run at deploy)"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        body = schema.build()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"Schema written to {settings.SCHEMA_DIR} ({len(body)} bytes, {elapsed * 1000:.0f} ms)")
@@ -0,0 +1,62 @@
+import os
+import re
+import sys
+import time
+import subprocess
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+CHILD_SCRIPT = """
+import sys, time
+started = float(sys.argv[1])
+import django
+django.setup()
+from django.conf import settings
+from django.test import Client
+host = next((h.lstrip('.') for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost')
+response = Client(HTTP_HOST=host).get(sys.argv[2])
+print(f"{time.time() - started} {response.status_code}")
+"""
+
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+class Command(BaseCommand):
+    help = ("Starts a fresh interpreter with -X importtime, serves one request and reports "
+            "import time per app/package and time-to-first-request")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--settings-module', default=os.environ.get('DJANGO_SETTINGS_MODULE'))
+        parser.add_argument('--path', default='/shop/categories/', help="URL of the first request")
+        parser.add_argument('--top', type=int, default=15)
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=options['settings_module'])
+        started = time.time()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', CHILD_SCRIPT, str(started), options['path']],
+            env=env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr[-2000:])
+
+        per_package = Counter()
+        for line in result.stderr.splitlines():
+            match = IMPORT_LINE.match(line)
+            if not match:
+                continue
+            module = match.group(4)
+            parts = module.split('.')
+            # свои приложения — по app, остальное — по пакету верхнего уровня
+            package = '.'.join(parts[:2]) if parts[0] in ('apps', 'core') else parts[0]
+            per_package[package] += int(match.group(1))
+
+        self.stdout.write(f"Settings: {options['settings_module']}")
+        for package, microseconds in per_package.most_common(options['top']):
+            self.stdout.write(f"{microseconds / 1000:9.1f} ms  {package}")
+        self.stdout.write(f"{sum(per_package.values()) / 1000:9.1f} ms  total imports")
+
+        ttfr, status = result.stdout.split()[-2:]
+        self.stdout.write(f"Time to first request ({options['path']} -> {status}): {float(ttfr) * 1000:.0f} ms")
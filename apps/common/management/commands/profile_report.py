@@ -0,0 +1,42 @@
+import io
+import os
+import pstats
+
+from django.conf                    import settings
+from django.core.management.base    import BaseCommand
+
+from apps.common.middleware import make_profile_token
+
+
+class Command(BaseCommand):
+    help = "Merges pstats dumps written by ProfilingMiddleware into a top-N hot function report per view"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument('--sort', default='cumulative', help="pstats sort key: cumulative, tottime, calls...")
+        parser.add_argument('--view', help="Only report views whose name contains this string")
+        parser.add_argument('--token', action='store_true', help="Print a signed X-Profile header value and exit")
+
+    def handle(self, *args, **options):
+        if options['token']:
+            self.stdout.write(make_profile_token())
+            return
+
+        directory = settings.PROFILING_DIR
+        if not os.path.isdir(directory):
+            self.stdout.write(f"No profiles in {directory}")
+            return
+
+        for view in sorted(os.listdir(directory)):
+            if options['view'] and options['view'] not in view:
+                continue
+            view_dir = os.path.join(directory, view)
+            files = [os.path.join(view_dir, name) for name in os.listdir(view_dir)]
+            if not files:
+                continue
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{view} ({len(files)} requests)"))
+            stream = io.StringIO()
+            stats = pstats.Stats(*files, stream=stream)
+            stats.strip_dirs().sort_stats(options['sort']).print_stats(options['top'])
+            self.stdout.write(stream.getvalue())
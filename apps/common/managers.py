@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Value
 from django.utils import timezone
 
 
@@ -23,12 +24,15 @@ class IsDeletedQuerySet(GetOrNoneQuerySet):
         if hard_delete:
             return super().delete()
         else:
-            return self.update(is_deleted=True, deleted_at=timezone.now())
+            now = timezone.now()
+            return self.update(is_deleted=True, deleted_at=now, updated_at=now)
 
 
 class IsDeletedManager(GetOrNoneManager):
     def get_queryset(self):
-        return IsDeletedQuerySet(self.model).filter(is_deleted=False)
+        # Value(False) дает `is_deleted = false`; голое False Django рендерит как `NOT is_deleted`,
+        # а такое условие SQLite/MySQL не могут искать по составным индексам (is_deleted, ...)
+        return IsDeletedQuerySet(self.model).filter(is_deleted=Value(False))
 
     def unfiltered(self):
         return IsDeletedQuerySet(self.model)
@@ -0,0 +1,151 @@
+import os
+import mmap
+import bisect
+import threading
+import contextvars
+
+from django.conf import settings
+
+
+# Каждый процесс пишет счетчики в свой mmap-файл METRICS_DIR/<pid>.metrics фиксированного размера,
+# эндпоинт /metrics суммирует все файлы. Слот = ключ маршрута + массив uint64 счетчиков.
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATUS_CLASSES = ('1xx', '2xx', '3xx', '4xx', '5xx')
+
+KEY_SIZE = 128
+SUM_US = len(BUCKETS) + 1                     # after the buckets (last one is +Inf)
+COUNT = SUM_US + 1
+STATUS = COUNT + 1
+DB_QUERIES = STATUS + len(STATUS_CLASSES)
+CACHE_HITS = DB_QUERIES + 1
+CACHE_MISSES = CACHE_HITS + 1
+NUM_COUNTERS = CACHE_MISSES + 1
+SLOT_SIZE = KEY_SIZE + NUM_COUNTERS * 8
+
+OVERFLOW_KEY = 'other ANY'
+
+request_stats = contextvars.ContextVar('metrics_request_stats', default=None)
+
+
+def record_cache(hit):
+    """ Called by cache layers so hits/misses are attributed to the current route """
+    stats = request_stats.get()
+    if stats is not None:
+        stats[0 if hit else 1] += 1
+
+
+class MetricsStore:
+    def __init__(self, directory, max_routes):
+        self.directory = directory
+        self.max_routes = max_routes
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{os.getpid()}.metrics")
+        size = self.max_routes * SLOT_SIZE
+        with open(path, 'a+b') as file:
+            if os.fstat(file.fileno()).st_size < size:
+                file.truncate(size)
+            self.mmap = mmap.mmap(file.fileno(), size)
+        self.slots = {}
+        for index, key in enumerate(read_keys(self.mmap, self.max_routes)):
+            if key:
+                self.slots[key] = index
+        self.counters = memoryview(self.mmap).cast('B')
+        self.pid = os.getpid()
+
+    def slot(self, key):
+        index = self.slots.get(key)
+        if index is None:
+            index = len(self.slots)
+            if index >= self.max_routes - 1:
+                # последний слот — общий для маршрутов, не влезших в таблицу
+                key, index = OVERFLOW_KEY, self.max_routes - 1
+            encoded = key.encode()[:KEY_SIZE]
+            offset = index * SLOT_SIZE
+            self.mmap[offset:offset + KEY_SIZE] = encoded.ljust(KEY_SIZE, b'\0')
+            self.slots[key] = index
+        offset = index * SLOT_SIZE + KEY_SIZE
+        return self.counters[offset:offset + NUM_COUNTERS * 8].cast('Q')
+
+    def observe(self, route, method, status, seconds, queries, cache_hits, cache_misses):
+        with self.lock:
+            if self.pid != os.getpid():
+                self.open()
+            counters = self.slot(f"{route} {method}")
+            counters[bisect.bisect_left(BUCKETS, seconds)] += 1
+            counters[SUM_US] += int(seconds * 1_000_000)
+            counters[COUNT] += 1
+            counters[STATUS + min(max(status // 100, 1), 5) - 1] += 1
+            counters[DB_QUERIES] += queries
+            counters[CACHE_HITS] += cache_hits
+            counters[CACHE_MISSES] += cache_misses
+
+
+def read_keys(buffer, max_routes):
+    return [
+        bytes(buffer[index * SLOT_SIZE:index * SLOT_SIZE + KEY_SIZE]).rstrip(b'\0').decode()
+        for index in range(max_routes)
+    ]
+
+
+def collect(directory):
+    """ Sums counters of all worker files: {'route METHOD': [counters]} """
+    totals = {}
+    if not os.path.isdir(directory):
+        return totals
+    for name in os.listdir(directory):
+        if not name.endswith('.metrics'):
+            continue
+        with open(os.path.join(directory, name), 'rb') as file:
+            data = file.read()
+        for index in range(len(data) // SLOT_SIZE):
+            offset = index * SLOT_SIZE
+            key = data[offset:offset + KEY_SIZE].rstrip(b'\0').decode()
+            if not key:
+                continue
+            counters = memoryview(data[offset + KEY_SIZE:offset + SLOT_SIZE]).cast('Q')
+            total = totals.setdefault(key, [0] * NUM_COUNTERS)
+            for i, value in enumerate(counters):
+                total[i] += value
+    return totals
+
+
+def render_prometheus(totals):
+    lines = [
+        '# TYPE http_request_duration_seconds histogram',
+    ]
+    for key, counters in sorted(totals.items()):
+        route, method = key.rsplit(' ', 1)
+        labels = f'route="{route}",method="{method}"'
+        cumulative = 0
+        for i, bound in enumerate(BUCKETS + ('+Inf',)):
+            cumulative += counters[i]
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'http_request_duration_seconds_sum{{{labels}}} {counters[SUM_US] / 1_000_000}')
+        lines.append(f'http_request_duration_seconds_count{{{labels}}} {counters[COUNT]}')
+
+    lines.append('# TYPE http_responses_total counter')
+    for key, counters in sorted(totals.items()):
+        route, method = key.rsplit(' ', 1)
+        for i, status in enumerate(STATUS_CLASSES):
+            if counters[STATUS + i]:
+                lines.append(f'http_responses_total{{route="{route}",method="{method}",status="{status}"}} {counters[STATUS + i]}')
+
+    for name, index in (('http_db_queries_total', DB_QUERIES),
+                        ('http_cache_hits_total', CACHE_HITS),
+                        ('http_cache_misses_total', CACHE_MISSES)):
+        lines.append(f'# TYPE {name} counter')
+        for key, counters in sorted(totals.items()):
+            route, method = key.rsplit(' ', 1)
+            lines.append(f'{name}{{route="{route}",method="{method}"}} {counters[index]}')
+    return '\n'.join(lines) + '\n'
+
+
+store = MetricsStore(
+    getattr(settings, 'METRICS_DIR', '/tmp/drf-shop-metrics'),
+    getattr(settings, 'METRICS_MAX_ROUTES', 256),
+)
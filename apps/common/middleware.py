@@ -0,0 +1,150 @@
+import os
+import time
+import random
+import cProfile
+
+from django.conf            import settings
+from django.core            import signing
+from django.core.exceptions import MiddlewareNotUsed
+from django.db              import connection
+from django.utils.cache     import patch_vary_headers
+
+from apps.common import metrics, compression
+
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_SALT = 'apps.common.profiling'
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует cProfile'ом часть запросов (PROFILING_SAMPLE_RATE) или запросы с
+    подписанным заголовком X-Profile (`manage.py profile_report --token`).
+    Дампы pstats пишутся в PROFILING_DIR/<view>/, на view хранится не больше PROFILING_MAX_FILES.
+    Выключено по умолчанию — тогда middleware выкидывается из цепочки целиком.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.directory = settings.PROFILING_DIR
+        self.max_files = settings.PROFILING_MAX_FILES
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        response = profiler.runcall(self.get_response, request)
+        self.dump(profiler, request)
+        return response
+
+    def should_profile(self, request):
+        token = request.META.get(PROFILE_HEADER)
+        if token:
+            try:
+                signing.loads(token, salt=PROFILE_SALT, max_age=60 * 60 * 24)
+                return True
+            except signing.BadSignature:
+                pass
+        return random.random() < self.sample_rate
+
+    def dump(self, profiler, request):
+        match = request.resolver_match
+        view = match._func_path if match else 'unresolved'
+        view_dir = os.path.join(self.directory, f"{view}.{request.method}")
+        os.makedirs(view_dir, exist_ok=True)
+        profiler.dump_stats(os.path.join(view_dir, f"{time.time_ns()}-{os.getpid()}.prof"))
+
+        files = sorted(os.listdir(view_dir))
+        for name in files[:-self.max_files]:
+            try:
+                os.remove(os.path.join(view_dir, name))
+            except FileNotFoundError:
+                pass
+
+
+class MetricsMiddleware:
+    """ Latency histogram, status, DB query and cache counters per route, see apps.common.metrics """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = [0]
+        stats = [0, 0]
+        token = metrics.request_stats.set(stats)
+
+        def count_query(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(count_query):
+                response = self.get_response(request)
+        finally:
+            metrics.request_stats.reset(token)
+        elapsed = time.perf_counter() - started
+
+        match = request.resolver_match
+        route = match.route if match else 'unresolved'
+        metrics.store.observe(route, request.method, response.status_code, elapsed, queries[0], *stats)
+        return response
+
+
+def make_profile_token():
+    return signing.dumps('profile', salt=PROFILE_SALT)
+
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/vnd.oai.openapi+json', 'application/javascript',
+                      'application/xml', 'text/')
+
+
+class CompressionMiddleware:
+    """
+    Сжимает ответы кодеком из Accept-Encoding (см. apps.common.compression), если тело не меньше
+    COMPRESSION_MIN_SIZE и тип текстовый. View может пометить ответ `compressed_cache_key` —
+    тогда сжатые байты берутся из кэша рядом с данными (ответы из кэша каталога не сжимаются повторно).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip()
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < self.min_size:
+            return response
+        encoding = compression.negotiate(request.headers.get('Accept-Encoding', ''))
+        if encoding is None:
+            return response
+
+        cache_key = getattr(response, 'compressed_cache_key', None)
+        if cache_key:
+            timeout = getattr(response, 'compressed_cache_timeout', 300)
+            body = compression.compress_cached(response.content, encoding, cache_key, timeout)
+        else:
+            body = compression.compress(response.content, encoding)
+        if len(body) >= len(response.content):
+            return response
+
+        response.content = body
+        response['Content-Length'] = str(len(body))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            # тело уже другое побайтно — strong ETag становится weak (как в GZipMiddleware)
+            response['ETag'] = 'W/' + etag
+        return response
@@ -1,6 +1,7 @@
 import uuid
 from django.utils   import timezone
 from django.db      import models
+from django.core.serializers.json import DjangoJSONEncoder
 
 from apps.common.managers import GetOrNoneManager, IsDeletedManager
 
@@ -29,7 +30,36 @@ class IsDeletedModel(BaseModel):
     def delete(self):
         self.is_deleted = True
         self.deleted_at = timezone.now()
-        self.save(update_fields=["is_deleted", "deleted_at"])
+        # updated_at тоже: по нему строится лента изменений, удаление попадает в нее как tombstone
+        self.save(update_fields=["is_deleted", "deleted_at", "updated_at"])
 
     def hard_delete(self, *args, **kwargs):
         super().delete(*args, **kwargs)
+
+
+class ArchivedRecord(BaseModel):
+    """ Soft-deleted rows moved out of hot tables by `manage.py archive_deleted` """
+    model = models.CharField(max_length=100)  # app_label.ModelName
+    object_id = models.CharField(max_length=64)
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.model} {self.object_id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['model', 'object_id'], name='unique_archived_record'),
+        ]
+        indexes = [
+            models.Index(fields=['model', 'deleted_at']),  # устаревшие курсоры ленты /shop/changes/
+        ]
+
+
+class Checkpoint(models.Model):
+    """ Watermark of incremental background jobs: up to which moment the data is processed """
+    name = models.CharField(max_length=100, unique=True)
+    position = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.position}"
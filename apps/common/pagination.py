@@ -1,7 +1,114 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+import base64
+import binascii
+
+from django.core.exceptions         import ValidationError
+from django.db.models               import Q
+from rest_framework.exceptions      import NotFound
+from rest_framework.pagination      import PageNumberPagination, CursorPagination
+from rest_framework.utils.urls      import replace_query_param
 
 
 class CustomPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 100
-    
\ No newline at end of file
+
+
+class CustomCursorPagination(CursorPagination):
+    """
+    Keyset pagination, no COUNT and no OFFSET. Sort keys come from `view.orderings`: {'newest': ('-created_at',)},
+    pk is appended as the final tiebreaker. Курсор хранит значения всех ключей последней (первой) строки,
+    поэтому страницы внутри повторяющихся значений (все отзывы на 5 звезд) тоже берутся по индексу,
+    а не сдвигом OFFSET, как у CursorPagination из DRF, который позиционируется только по первому ключу.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at',)
+    ordering_query_param = 'ordering'
+
+    def get_ordering(self, request, queryset, view):
+        orderings = getattr(view, 'orderings', {})
+        ordering = tuple(orderings.get(request.query_params.get(self.ordering_query_param), self.ordering))
+        return ordering + ('-pk' if ordering[-1].startswith('-') else 'pk',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+        self.ordering = self.get_ordering(request, queryset, view)
+        position, reverse = self.decode_cursor(request)
+
+        ordering = tuple(flip(field) for field in self.ordering) if reverse else self.ordering
+        if position is not None:
+            queryset = queryset.filter(after(position, ordering))
+        rows = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def get_next_link(self):
+        if not (self.has_next and self.page):
+            return None
+        return self.encode_cursor((self.position(self.page[-1]), False))
+
+    def get_previous_link(self):
+        if not (self.has_previous and self.page):
+            return None
+        return self.encode_cursor((self.position(self.page[0]), True))
+
+    def field(self, name):
+        return self.model._meta.pk if name == 'pk' else self.model._meta.get_field(name)
+
+    def position(self, row):
+        return [self.field(field.lstrip('-')).value_from_object(row) for field in self.ordering]
+
+    def encode_cursor(self, cursor):
+        position, reverse = cursor
+        data = {'o': self.ordering, 'p': position, 'r': reverse}
+        # str(): datetime с микросекундами (DjangoJSONEncoder обрезает до миллисекунд), UUID, Decimal
+        encoded = base64.urlsafe_b64encode(json.dumps(data, default=str).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            # курсор другой сортировки (клиент сменил ?ordering=) не применим
+            if tuple(data['o']) != self.ordering or len(data['p']) != len(self.ordering):
+                raise ValueError
+            position = [
+                self.field(field.lstrip('-')).to_python(value) for field, value in zip(self.ordering, data['p'])
+            ]
+            return position, bool(data['r'])
+        except (binascii.Error, ValueError, ValidationError, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+def flip(field):
+    return field[1:] if field.startswith('-') else '-' + field
+
+
+def after(position, ordering):
+    """
+    Rows strictly after `position` in `ordering`: (a > x) OR (a = x AND b > y) OR ...
+    Отдельное условие на первый ключ (a >= x) дает планировщику диапазон по индексу.
+    """
+    condition, equal = Q(), {}
+    for field, value in zip(ordering, position):
+        name, lookup = field.lstrip('-'), 'lt' if field.startswith('-') else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    first = ordering[0]
+    return Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": position[0]}) & condition
@@ -0,0 +1,92 @@
+import gzip
+import hashlib
+import os
+import sys
+import threading
+import subprocess
+
+from django.conf import settings
+
+
+# OpenAPI-схема генерируется один раз (`manage.py build_schema` при деплое или при первом запросе)
+# и отдается из памяти. Пересобирается только если изменился код (отпечаток .py файлов).
+# Если задан SCHEMA_BUILD_SETTINGS (прод), схему строит отдельный процесс с этими настройками:
+# views воркера собраны без AutoSchema drf_spectacular.
+
+SOURCE_DIRS = ('apps', 'core')
+
+_lock = threading.Lock()
+_cached = None
+
+
+def source_fingerprint():
+    digest = hashlib.sha1()
+    for directory in SOURCE_DIRS:
+        for root, dirs, files in os.walk(os.path.join(settings.BASE_DIR, directory)):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith('.py'):
+                    stat = os.stat(os.path.join(root, name))
+                    digest.update(f"{root}/{name}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+    return digest.hexdigest()
+
+
+def generate():
+    from drf_spectacular.renderers import OpenApiJsonRenderer
+    from drf_spectacular.settings import spectacular_settings
+
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    return OpenApiJsonRenderer().render(schema, renderer_context={})
+
+
+def build_in_subprocess(settings_module):
+    subprocess.run(
+        [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'build_schema', '--settings', settings_module],
+        check=True, capture_output=True,
+    )
+    with open(os.path.join(settings.SCHEMA_DIR, 'openapi.json'), 'rb') as file:
+        return file.read()
+
+
+def build(fingerprint=None):
+    """ Generates the schema and writes body, gzip body and fingerprint into SCHEMA_DIR """
+    build_settings = getattr(settings, 'SCHEMA_BUILD_SETTINGS', None)
+    if build_settings:
+        return build_in_subprocess(build_settings)
+    body = generate()
+    fingerprint = fingerprint or source_fingerprint()
+    os.makedirs(settings.SCHEMA_DIR, exist_ok=True)
+    for name, content in (('openapi.json', body),
+                          ('openapi.json.gz', gzip.compress(body, 9)),
+                          ('fingerprint', fingerprint.encode())):
+        path = os.path.join(settings.SCHEMA_DIR, name)
+        with open(path + '.tmp', 'wb') as file:
+            file.write(content)
+        os.replace(path + '.tmp', path)
+    return body
+
+
+def load():
+    """ (body, gzip_body, etag), regenerated only when the code fingerprint changed """
+    global _cached
+    if _cached is not None:
+        return _cached
+    with _lock:
+        if _cached is not None:
+            return _cached
+        fingerprint = source_fingerprint()
+        try:
+            with open(os.path.join(settings.SCHEMA_DIR, 'fingerprint'), 'rb') as file:
+                fresh = file.read().decode() == fingerprint
+            with open(os.path.join(settings.SCHEMA_DIR, 'openapi.json'), 'rb') as file:
+                body = file.read()
+            with open(os.path.join(settings.SCHEMA_DIR, 'openapi.json.gz'), 'rb') as file:
+                gzip_body = file.read()
+        except FileNotFoundError:
+            fresh = False
+        if not fresh:
+            body = build(fingerprint)
+            gzip_body = gzip.compress(body, 9)
+        _cached = (body, gzip_body, f'"{hashlib.sha1(body).hexdigest()}"')
+        return _cached
@@ -0,0 +1,49 @@
+from rest_framework import serializers
+
+
+class SparseFieldsMixin:
+    """
+    ?fields=a,b / ?exclude=c для сериализатора и queryset.
+    `field_sources` — какие колонки модели (через __ для связей) нужны каждому полю,
+    по ним строятся only() и select_related(), так что ненужные колонки и JOIN'ы не выбираются.
+    """
+    field_sources = {}
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def get_sparse_fields(cls, query_params):
+        """ Field names requested via query params, None if all fields are wanted """
+        fields = query_params.get('fields')
+        exclude = query_params.get('exclude')
+        if not fields and not exclude:
+            return None
+
+        available = list(cls._declared_fields)
+        selected = [name for name in fields.split(',') if name] if fields else available
+        excluded = [name for name in exclude.split(',') if name] if exclude else []
+        unknown = set(selected + excluded) - set(available)
+        if unknown:
+            raise serializers.ValidationError(
+                {'fields': f"Unknown fields: {', '.join(sorted(unknown))}. Available: {', '.join(available)}"}
+            )
+        selected = [name for name in selected if name not in excluded]
+        if not selected:
+            raise serializers.ValidationError({'fields': f"No fields selected. Available: {', '.join(available)}"})
+        return selected
+
+    @classmethod
+    def sparse_queryset(cls, queryset, fields):
+        if fields is None:
+            return queryset
+        paths = [path for name in fields for path in cls.field_sources.get(name, [])]
+        relations = {path.rsplit('__', 1)[0] for path in paths if '__' in path}
+        queryset = queryset.select_related(None)
+        # select_related() без аргументов — JOIN всех FK
+        if relations:
+            queryset = queryset.select_related(*relations)
+        return queryset.only(*paths)
@@ -1,3 +1,44 @@
-from django.test import TestCase
+from django.core.cache  import caches
+from django.test        import SimpleTestCase, override_settings
 
-# Create your tests here.
+from apps.common.checks import check_idempotency_cache
+from apps.shop.tests    import CatalogTestCase
+
+
+class IdempotencyCacheCheckTests(SimpleTestCase):
+    def check_ids(self):
+        return [error.id for error in check_idempotency_cache(None)]
+
+    def test_shared_cache_passes(self):
+        self.assertEqual(self.check_ids(), [])
+
+    def test_process_local_cache_fails(self):
+        for backend in ['django.core.cache.backends.locmem.LocMemCache', 'django.core.cache.backends.dummy.DummyCache']:
+            with self.subTest(backend=backend), override_settings(CACHES={
+                'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                'idempotency': {'BACKEND': backend},
+            }):
+                self.assertEqual(self.check_ids(), ['common.E002'])
+
+    def test_missing_alias_fails(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertEqual(self.check_ids(), ['common.E001'])
+
+
+class IdempotentRequestTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        caches['idempotency'].clear()
+
+    def post(self, quantity, key='cart-1'):
+        data = {'slug': self.products[0].slug, 'quantity': quantity}
+        return self.client.post('/shop/cart/', data, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_replay_is_stored_in_shared_cache(self):
+        first = self.post(1)
+        self.assertEqual(first.status_code, 201)
+        replayed = self.post(1)
+        self.assertEqual((replayed.status_code, replayed.data), (201, first.data))
+        self.assertEqual(replayed.headers['Idempotent-Replayed'], 'true')
+        self.assertEqual(self.post(2).status_code, 422)
+        self.assertEqual(self.post(2, key='cart-2').status_code, 200)
@@ -0,0 +1,90 @@
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Token bucket поверх любого Django cache backend.
+
+    В отличие от SimpleRateThrottle, который хранит список timestamp'ов всех
+    запросов за период, здесь на ключ хранится только пара (tokens, last_refill),
+    т.е. O(1) памяти и CPU на запрос. Rate 'N/period' означает: ведро на N
+    токенов, которое равномерно пополняется за period.
+    """
+    cache_format = 'throttle_tb_%(scope)s_%(ident)s'
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        tokens, last_refill = self.cache.get(self.key, (self.num_requests, self.now))
+        refill_rate = self.num_requests / self.duration
+        self.tokens = min(self.num_requests, tokens + (self.now - last_refill) * refill_rate)
+
+        if self.tokens < 1:
+            return self.throttle_failure()
+        return self.throttle_success()
+
+    def throttle_success(self):
+        self.tokens -= 1
+        self.cache.set(self.key, (self.tokens, self.now), self.duration)
+        return True
+
+    def throttle_failure(self):
+        self.cache.set(self.key, (self.tokens, self.now), self.duration)
+        return False
+
+    def wait(self):
+        refill_rate = self.num_requests / self.duration
+        return (1 - self.tokens) / refill_rate
+
+
+class AnonTokenBucketThrottle(TokenBucketThrottle):
+    scope = 'anon'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    scope = 'user'
+
+    def get_cache_key(self, request, view):
+        if not (request.user and request.user.is_authenticated):
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': request.user.pk}
+
+
+class ScopedTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Лимит на конкретный эндпоинт: view задает `throttle_scope`,
+    rate берется из DEFAULT_THROTTLE_RATES[throttle_scope].
+    Ключ — пользователь (или IP для анонимов) внутри scope.
+    """
+    scope_attr = 'throttle_scope'
+
+    def __init__(self):
+        # rate определяется только в allow_request, когда известна view
+        pass
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
@@ -1,3 +1,47 @@
-from django.shortcuts import render
+import hmac
 
-# Create your views here.
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, HttpResponseNotModified, Http404
+from django.utils.module_loading import import_string
+
+from apps.common import metrics, schema, compression
+
+
+def metrics_view(request):
+    """ Prometheus text format, aggregated over all worker processes. Disabled until METRICS_TOKEN is set """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if not token:
+        raise Http404()
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponseForbidden()
+    body = metrics.render_prometheus(metrics.collect(metrics.store.directory))
+    return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def schema_view(request):
+    """ Precompiled OpenAPI schema with ETag and gzip, see apps.common.schema """
+    body, gzip_body, etag = schema.load()
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+    elif compression.accepts(request.headers.get('Accept-Encoding', ''), 'gzip'):
+        response = HttpResponse(gzip_body, content_type='application/vnd.oai.openapi+json')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(body, content_type='application/vnd.oai.openapi+json')
+    response['ETag'] = etag
+    response['Vary'] = 'Accept-Encoding'
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def lazy_view(dotted_path, **initkwargs):
+    """ Imports a class-based view on the first request, so heavy view modules stay out of worker boot """
+    view = None
+
+    def wrapper(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(dotted_path).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base    import BaseCommand
+from django.db                      import transaction
+
+from apps.profiles.models import ShippingAddress
+
+
+class Command(BaseCommand):
+    help = "Backfills ShippingAddress.content_hash in batches and deletes duplicate addresses of the same user"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fields = ShippingAddress.HASHED_FIELDS
+        backfilled = deleted = 0
+        started = time.perf_counter()
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    ShippingAddress.objects.filter(content_hash__isnull=True)
+                    .order_by('created_at')
+                    .only('id', 'user_id', *fields)[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                for address in batch:
+                    address.content_hash = ShippingAddress.make_content_hash(
+                        {field: getattr(address, field) for field in fields}
+                    )
+
+                # дубликаты: такой хэш уже есть у пользователя в БД или раньше в этой же пачке
+                existing = set(
+                    ShippingAddress.objects.filter(
+                        user_id__in={address.user_id for address in batch},
+                        content_hash__in={address.content_hash for address in batch},
+                    ).values_list('user_id', 'content_hash')
+                )
+                keep, duplicates = [], []
+                for address in batch:
+                    key = (address.user_id, address.content_hash)
+                    if key in existing:
+                        duplicates.append(address.id)
+                    else:
+                        existing.add(key)
+                        keep.append(address)
+
+                ShippingAddress.objects.filter(id__in=duplicates).delete()
+                ShippingAddress.objects.bulk_update(keep, ['content_hash'])
+                backfilled += len(keep)
+                deleted += len(duplicates)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"Backfilled {backfilled}, deleted {deleted} duplicates in {elapsed:.1f}s")
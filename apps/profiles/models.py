@@ -1,3 +1,5 @@
+import hashlib
+
 from django.db import models
 
 from apps.accounts.models   import User
@@ -17,10 +19,28 @@ class ShippingAddress(BaseModel):
     city = models.CharField(max_length=200, null=True)
     country = models.CharField(max_length=200, null=True)
     zipcode = models.CharField(max_length=10, null=True)
+    # sha256 нормализованных полей адреса, заменяет поиск по семи текстовым колонкам
+    content_hash = models.CharField(max_length=64, null=True, editable=False)
+
+    HASHED_FIELDS = ('full_name', 'email', 'phone', 'address', 'city', 'country', 'zipcode')
 
     def __str__(self):
         return f"{self.full_name}'s shipping details"
-    
+
+    @classmethod
+    def make_content_hash(cls, data):
+        normalized = '\x1f'.join(' '.join(str(data.get(field) or '').split()).lower() for field in cls.HASHED_FIELDS)
+        return hashlib.sha256(normalized.encode()).hexdigest()
+
+    def save(self, *args, **kwargs):
+        self.content_hash = self.make_content_hash({field: getattr(self, field) for field in self.HASHED_FIELDS})
+        super().save(*args, **kwargs)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'content_hash'], name='unique_user_shipping_address'),
+        ]
+
 
 
 DELIVERY_STATUS_CHOICES = (
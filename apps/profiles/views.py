@@ -1,3 +1,4 @@
+from django.db                  import IntegrityError, transaction
 from rest_framework.views       import APIView
 from drf_spectacular.utils      import extend_schema
 from rest_framework.response    import Response
@@ -88,7 +89,10 @@ class ShippingAddressesView(APIView):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
-        shipping_address, _ = ShippingAddress.objects.get_or_create(user=user, **data)
+        # одна выборка по уникальному (user, content_hash); гонку за INSERT разрешает сам get_or_create
+        shipping_address, _ = ShippingAddress.objects.get_or_create(
+            user=user, content_hash=ShippingAddress.make_content_hash(data), defaults=data,
+        )
         serializer = self.serializer_class(shipping_address)
         return Response(data=serializer.data, status=201)
 
@@ -137,7 +141,11 @@ class ShippingAddressViewID(APIView):
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
         shipping_address = set_dict_attr(shipping_address, data)
-        shipping_address.save()
+        try:
+            with transaction.atomic():
+                shipping_address.save()
+        except IntegrityError:
+            return Response(data={"message": "Such shipping address already exists!"}, status=400)
         serializer = self.serializer_class(shipping_address)
         return Response(data=serializer.data, status=200)
 
@@ -29,5 +29,8 @@ class Seller(BaseModel):
 
     is_approved = models.BooleanField(default=False)
 
+    # Traffic
+    product_views = models.PositiveBigIntegerField(default=0)
+
     def __str__(self):
         return f"Seller for {self.business_name}"
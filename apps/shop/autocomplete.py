@@ -0,0 +1,279 @@
+import re
+import time
+import array
+import bisect
+import heapq
+import struct
+import threading
+
+from django.conf        import settings
+from django.db.models   import Q, Sum
+
+from apps.shop.models       import Category, Product
+from apps.sellers.models    import Seller
+
+
+# Подсказки поиска: отсортированные ключи + бинарный поиск по префиксу.
+# Ключ — нормализованное название, начиная с каждого слова ("apple iphone 15" -> "apple iphone 15",
+# "iphone 15", "15"), поэтому находится и префикс второго слова. Параллельно ключам — array номеров
+# записей; запись = (type, name, slug, weight), вес — популярность (просмотры).
+#
+# Основной массив ключей сжат front coding'ом: блоки по BLOCK_SIZE ключей, первый ключ блока хранится
+# целиком (по ним идет bisect), остальные — как (длина общего префикса с предыдущим, остаток) в одном
+# bytes на блок. Поиск префикса раскодирует только два граничных блока диапазона.
+# Изменения от сигналов идут в небольшой несжатый delta-массив, удаление — просто исчезновение записи
+# из entries (ее ключи становятся мертвыми); основной массив пересобирается целиком фоновой
+# перестройкой индекса. Для коротких префиксов top-k кэшируется и точечно сбрасывается при изменениях.
+
+SHORT_PREFIX = 2
+MAX_LIMIT = 20
+BLOCK_SIZE = 16
+DELTA_LIMIT = 10000     # ключей в delta, после которых индекс пересобирается, не дожидаясь интервала
+
+SUFFIX_HEADER = struct.Struct('<HH')   # длина общего префикса, длина остатка (в байтах UTF-8)
+PREFIX_END = b'\xff'                    # не встречается в UTF-8: prefix + PREFIX_END больше любого ключа с prefix
+
+
+def normalize(text):
+    return re.findall(r'\w+', (text or '').casefold().replace('ё', 'е'))
+
+
+def make_keys(name):
+    words = normalize(name)
+    return {' '.join(words[i:]) for i in range(len(words))}
+
+
+def shared_prefix(a, b):
+    length = min(len(a), len(b))
+    for i in range(length):
+        if a[i] != b[i]:
+            return i
+    return length
+
+
+def encode_block(keys):
+    """ Keys after the block head, each as (shared prefix length, suffix) relative to the previous key """
+    block = bytearray()
+    for previous, key in zip(keys, keys[1:]):
+        shared = shared_prefix(previous, key)
+        block += SUFFIX_HEADER.pack(shared, len(key) - shared)
+        block += key[shared:]
+    return bytes(block)
+
+
+class AutocompleteIndex:
+    def __init__(self):
+        self.heads = []                 # первый ключ каждого блока (bytes)
+        self.blocks = []                # остальные ключи блока, front-coded
+        self.ids = array.array('I')     # номер записи для каждого ключа основного массива
+        self.delta_keys = []            # ключи, добавленные после сборки (str, отсортированы)
+        self.delta_ids = array.array('I')
+        self.entries = {}               # id -> (type, name, slug, weight)
+        self.ref_ids = {}               # (type, pk) -> id
+        self.next_id = 0
+        self.top_cache = {}
+        self.lock = threading.Lock()
+
+    @property
+    def needs_rebuild(self):
+        return len(self.delta_keys) > DELTA_LIMIT
+
+    def add(self, kind, pk, name, slug, weight=None):
+        """ Inserts or replaces an entry; weight=None keeps the current one """
+        with self.lock:
+            entry_id = self.ref_ids.get((kind, pk))
+            current = self.entries.get(entry_id)
+            if weight is None:
+                weight = current[3] if current else 0
+            if current and current[1] == name:
+                # те же ключи (частый случай: сохранение товара без смены названия) — меняется только запись
+                self.entries[entry_id] = (kind, name, slug, weight)
+                self._forget_name(name)
+                return
+            self._remove((kind, pk))
+            entry_id = self.next_id
+            self.next_id += 1
+            self.ref_ids[(kind, pk)] = entry_id
+            self.entries[entry_id] = (kind, name, slug, weight)
+            for key in make_keys(name):
+                position = bisect.bisect_right(self.delta_keys, key)
+                self.delta_keys.insert(position, key)
+                self.delta_ids.insert(position, entry_id)
+                self._forget(key)
+
+    def remove(self, kind, pk):
+        with self.lock:
+            self._remove((kind, pk))
+
+    def _remove(self, ref):
+        """ Keys stay in the arrays until the next rebuild, search skips ids without an entry """
+        entry_id = self.ref_ids.pop(ref, None)
+        if entry_id is not None:
+            self._forget_name(self.entries.pop(entry_id)[1])
+
+    def _forget_name(self, name):
+        for key in make_keys(name):
+            self._forget(key)
+
+    def _forget(self, key):
+        for length in range(1, SHORT_PREFIX + 1):
+            self.top_cache.pop(key[:length], None)
+
+    def bulk_load(self, rows):
+        """ rows: (type, pk, name, slug, weight); sorts once and front-codes the result """
+        pairs = []
+        for kind, pk, name, slug, weight in rows:
+            entry_id = self.next_id
+            self.next_id += 1
+            self.ref_ids[(kind, pk)] = entry_id
+            self.entries[entry_id] = (kind, name, slug, weight)
+            pairs.extend((key.encode(), entry_id) for key in make_keys(name))
+        pairs.sort()
+        self.ids = array.array('I', (entry_id for _, entry_id in pairs))
+        keys = [key for key, _ in pairs]
+        for start in range(0, len(keys), BLOCK_SIZE):
+            block = keys[start:start + BLOCK_SIZE]
+            self.heads.append(block[0])
+            self.blocks.append(encode_block(block))
+
+    def lower_bound(self, key):
+        """ Position of the first key >= `key`: bisect over block heads, then decode one block up to the match """
+        block = bisect.bisect_left(self.heads, key) - 1
+        if block < 0:
+            return 0
+        data, current = self.blocks[block], self.heads[block]
+        position, offset = 0, 1
+        while position < len(data):
+            shared, length = SUFFIX_HEADER.unpack_from(data, position)
+            position += SUFFIX_HEADER.size
+            current = current[:shared] + data[position:position + length]
+            position += length
+            if current >= key:
+                break
+            offset += 1
+        return block * BLOCK_SIZE + offset
+
+    def search(self, query, limit=10):
+        prefix = ' '.join(normalize(query))
+        if not prefix:
+            return []
+        with self.lock:
+            top = self.top_cache.get(prefix)
+            if top is None:
+                encoded = prefix.encode()
+                matches = set(self.ids[self.lower_bound(encoded):self.lower_bound(encoded + PREFIX_END)])
+                start = bisect.bisect_left(self.delta_keys, prefix)
+                end = bisect.bisect_left(self.delta_keys, prefix + '\U0010ffff', lo=start)
+                matches.update(self.delta_ids[start:end])
+                top = heapq.nlargest(
+                    MAX_LIMIT,
+                    (entry_id for entry_id in matches if entry_id in self.entries),
+                    key=lambda entry_id: (self.entries[entry_id][3], -entry_id),
+                )
+                if len(prefix) <= SHORT_PREFIX:
+                    self.top_cache[prefix] = top
+            entries = [self.entries[entry_id] for entry_id in top[:limit]]
+        return [{'type': kind, 'name': name, 'slug': slug} for kind, name, slug, _ in entries]
+
+
+def load_rows():
+    """ Three bulk queries: live products, categories, approved sellers """
+    live = Q(products__is_deleted=False)
+    yield from (
+        ('product', pk, name, slug, views)
+        for pk, name, slug, views in Product.objects.values_list('id', 'name', 'slug', 'views').iterator(chunk_size=5000)
+    )
+    yield from (
+        ('category', pk, name, slug, weight or 0)
+        for pk, name, slug, weight in Category.objects.annotate(weight=Sum('products__views', filter=live))
+        .values_list('id', 'name', 'slug', 'weight')
+    )
+    yield from (
+        ('seller', pk, name, slug, views)
+        for pk, name, slug, views in Seller.objects.filter(is_approved=True)
+        .values_list('id', 'business_name', 'slug', 'product_views')
+    )
+
+
+class Autocomplete:
+    """
+    Индекс процесса. Строится первым запросом из bulk-запросов, дальше обновляется сигналами
+    записи Product/Category/Seller. Сигналы видит только процесс, который пишет, и счетчик просмотров
+    обновляет веса UPDATE'ом без сигналов, поэтому раз в AUTOCOMPLETE_REBUILD_INTERVAL секунд
+    (или когда delta-массив разросся) индекс пересобирается в фоновом потоке и подменяется целиком.
+    Сигналы, пришедшие во время сборки, запоминаются и применяются к новому индексу перед подменой.
+    """
+
+    def __init__(self):
+        self.index = None
+        self.built_at = 0
+        self.lock = threading.Lock()
+        self.build_lock = threading.Lock()
+        self.rebuilding = False
+        self.replay = None
+
+    def build(self):
+        with self.lock:
+            self.replay = []
+        index = AutocompleteIndex()
+        try:
+            index.bulk_load(load_rows())
+        except Exception:
+            with self.lock:
+                self.replay = None
+            raise
+        with self.lock:
+            for update in self.replay:
+                apply(index, *update)
+            self.replay = None
+            self.index, self.built_at = index, time.monotonic()
+        return index
+
+    def get_index(self):
+        if self.index is None:
+            with self.build_lock:
+                if self.index is None:
+                    self.build()
+        elif time.monotonic() - self.built_at > getattr(settings, 'AUTOCOMPLETE_REBUILD_INTERVAL', 10 * 60):
+            self.rebuild_in_background()
+        return self.index
+
+    def rebuild_in_background(self):
+        with self.lock:
+            if self.rebuilding:
+                return
+            self.rebuilding = True
+
+        def run():
+            from django.db import close_old_connections
+            try:
+                self.build()
+            finally:
+                self.rebuilding = False
+                close_old_connections()
+
+        threading.Thread(target=run, name='autocomplete-rebuild', daemon=True).start()
+
+    def search(self, query, limit=10):
+        return self.get_index().search(query, min(limit, MAX_LIMIT))
+
+    def update(self, kind, pk, name, slug, weight=None, live=True):
+        """ Signal handlers; ignored until the index is built """
+        with self.lock:
+            if self.replay is not None:
+                self.replay.append((kind, pk, name, slug, weight, live))
+            index = self.index
+            if index is not None:
+                apply(index, kind, pk, name, slug, weight, live)
+        if index is not None and index.needs_rebuild:
+            self.rebuild_in_background()
+
+
+def apply(index, kind, pk, name, slug, weight, live):
+    if live:
+        index.add(kind, pk, name, slug, weight)
+    else:
+        index.remove(kind, pk)
+
+
+autocomplete = Autocomplete()
@@ -0,0 +1,70 @@
+from django.conf        import settings
+from django.core.cache  import cache
+
+from apps.common.metrics import record_cache
+
+
+class ProductCache:
+    """
+    Сериализованные ProductSerializer данные по slug.
+    Выключается PRODUCT_CACHE_TIMEOUT = 0, сбрасывается сигналами на запись Product и при изменении отзывов.
+    """
+    key_format = 'product_%s'
+
+    def __init__(self, cache=cache):
+        self.cache = cache
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'PRODUCT_CACHE_TIMEOUT', 0)
+
+    @property
+    def enabled(self):
+        return bool(self.timeout)
+
+    def get_many(self, slugs):
+        if not self.enabled:
+            return {}
+        found = self.cache.get_many([self.key_format % slug for slug in slugs])
+        result = {}
+        for slug in slugs:
+            data = found.get(self.key_format % slug)
+            record_cache(data is not None)
+            if data is not None:
+                result[slug] = data
+        return result
+
+    def get(self, slug):
+        return self.get_many([slug]).get(slug)
+
+    def set_many(self, data_by_slug):
+        if self.enabled:
+            self.cache.set_many({self.key_format % slug: data for slug, data in data_by_slug.items()}, self.timeout)
+
+    def invalidate(self, *slugs):
+        self.cache.delete_many([self.key_format % slug for slug in slugs])
+
+
+product_cache = ProductCache()
+
+
+class CategoryListCache:
+    """ CategoriesView payload with per-category product stats, dropped on any Product/Category write """
+    key = 'categories_with_stats'
+
+    def __init__(self, cache=cache):
+        self.cache = cache
+
+    def get(self):
+        data = self.cache.get(self.key)
+        record_cache(data is not None)
+        return data
+
+    def set(self, data):
+        self.cache.set(self.key, data, getattr(settings, 'CATEGORY_CACHE_TIMEOUT', 60 * 60))
+
+    def invalidate(self):
+        self.cache.delete(self.key)
+
+
+category_cache = CategoryListCache()
@@ -0,0 +1,140 @@
+import uuid
+
+from django.db          import transaction
+from django.db.models   import F
+
+from apps.shop.models       import Cart, Product
+from apps.profiles.models   import OrderItem
+
+
+class CartConflict(Exception):
+    """ The cart kept changing concurrently, the update could not be applied """
+
+
+class CartStore:
+    """
+    Корзина пользователя: {product_id: quantity} в строке Cart.
+
+    Клики по корзине меняют только эту строку — один UPDATE ... WHERE version = N, который
+    одновременно ставит dirty. OrderItem обновляется при checkout или периодическим
+    `manage.py flush_carts` (write-behind). Два параллельных изменения не затирают друг друга:
+    проигравший UPDATE не находит свою версию и повторяет чтение-изменение.
+    Корзина без строки Cart (до write-behind) восстанавливается из OrderItem.
+    """
+    max_attempts = 5
+
+    def load(self, user):
+        """ (lines, version); creates the row from OrderItem if the user has none yet """
+        row = Cart.objects.filter(user=user).values_list('lines', 'version').first()
+        if row is None:
+            lines = dict(
+                OrderItem.objects.filter(user=user, order=None)
+                .order_by('created_at')
+                .values_list('product_id', 'quantity')
+            )
+            Cart.objects.bulk_create([Cart(user=user, lines=encode(lines))], ignore_conflicts=True)
+            return self.load(user) if not lines else (lines, 0)
+        lines, version = row
+        return decode(lines), version
+
+    def get_lines(self, user):
+        return self.load(user)[0]
+
+    def update(self, user, change):
+        """ Applies change(lines) with optimistic locking, returns its result """
+        for _ in range(self.max_attempts):
+            lines, version = self.load(user)
+            result = change(lines)
+            updated = Cart.objects.filter(user=user, version=version).update(
+                lines=encode(lines), version=F('version') + 1, dirty=True,
+            )
+            if updated:
+                return result
+        raise CartConflict(f"Cart of user {user.pk} changed {self.max_attempts} times during the update")
+
+    def set_quantity(self, user, product, quantity):
+        """ Returns True if the product was not in the cart before """
+        return product.pk in self.set_quantities(user, {product: quantity})
+
+    def set_quantities(self, user, quantities):
+        """ Applies {product: quantity} in one write, returns pks of newly added products """
+        def change(lines):
+            created = set()
+            for product, quantity in quantities.items():
+                if product.pk not in lines:
+                    created.add(product.pk)
+                if quantity:
+                    lines[product.pk] = quantity
+                else:
+                    lines.pop(product.pk, None)
+            return created
+        return self.update(user, change)
+
+    def merge(self, user, quantities):
+        """ Adds {product: quantity} to the cart (guest cart on login) with one write """
+        def change(lines):
+            for product, quantity in quantities.items():
+                lines[product.pk] = lines.get(product.pk, 0) + quantity
+        self.update(user, change)
+
+    def items(self, user):
+        """ Unsaved OrderItem objects validated against products with one query, newest first """
+        lines = self.get_lines(user)
+        products = Product.objects.select_related('seller', 'seller__user').in_bulk(lines.keys())
+        return [
+            OrderItem(user=user, product=products[product_id], quantity=quantity)
+            for product_id, quantity in reversed(lines.items())
+            if product_id in products
+        ]
+
+    def clear(self, user):
+        """ After checkout: the lines are in the order now """
+        Cart.objects.filter(user=user).update(lines=[], version=F('version') + 1, dirty=False)
+
+    def flush(self, user):
+        """ Persists cart lines into OrderItem """
+        row = Cart.objects.filter(user=user, dirty=True).values_list('lines', 'version').first()
+        if row is None:
+            return
+        lines, version = decode(row[0]), row[1]
+        with transaction.atomic():
+            existing = {
+                item.product_id: item
+                for item in OrderItem.objects.select_for_update().filter(user=user, order=None)
+            }
+            to_create = [
+                OrderItem(user=user, product_id=product_id, quantity=quantity)
+                for product_id, quantity in lines.items() if product_id not in existing
+            ]
+            to_update = []
+            for product_id, item in existing.items():
+                if product_id in lines and item.quantity != lines[product_id]:
+                    item.quantity = lines[product_id]
+                    to_update.append(item)
+            to_delete = [item.pk for product_id, item in existing.items() if product_id not in lines]
+
+            if to_delete:
+                OrderItem.objects.filter(pk__in=to_delete).delete()
+            OrderItem.objects.bulk_create(to_create)
+            OrderItem.objects.bulk_update(to_update, ['quantity'])
+            # корзина изменилась, пока писали OrderItem, — dirty остается до следующего сброса
+            Cart.objects.filter(user=user, version=version).update(dirty=False)
+
+    def flush_dirty(self):
+        """ Only carts marked dirty, by the partial index on Cart.dirty """
+        flushed = 0
+        for cart in Cart.objects.filter(dirty=True).select_related('user'):
+            self.flush(cart.user)
+            flushed += 1
+        return flushed
+
+
+def encode(lines):
+    return [[str(product_id), quantity] for product_id, quantity in lines.items()]
+
+
+def decode(lines):
+    return {uuid.UUID(product_id): quantity for product_id, quantity in lines}
+
+
+cart_store = CartStore()
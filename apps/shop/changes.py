@@ -0,0 +1,104 @@
+import json
+import uuid
+import base64
+import binascii
+from datetime import timedelta
+
+from django.conf                import settings
+from django.db.models           import Q
+from django.utils               import timezone
+from django.utils.dateparse     import parse_datetime
+
+from apps.common.models import ArchivedRecord
+from apps.shop.models   import Product
+
+
+# Лента изменений каталога для синхронизации клиентов: строки с (updated_at, id) больше курсора,
+# по индексу (updated_at, id). Мягко удаленные товары приходят tombstone'ами (deleted_at),
+# пока их не перенес в архив `manage.py archive_deleted` — если в архив ушел tombstone новее курсора,
+# клиенту нужна полная пересинхронизация.
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(positions, since):
+    """ {'products': (updated_at, id) | None, ...} + start of the client's sync -> opaque string """
+    data = {
+        stream: [position[0].isoformat(), str(position[1])] if position else None
+        for stream, position in positions.items()
+    }
+    data['since'] = since.isoformat()
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+def decode_cursor(cursor, streams):
+    """ -> (positions, since); без курсора синхронизация начинается сейчас """
+    if not cursor:
+        return {stream: None for stream in streams}, timezone.now()
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        positions = {}
+        for stream in streams:
+            position = data.get(stream)
+            if position is None:
+                positions[stream] = None
+                continue
+            updated_at = parse_datetime(position[0])
+            if updated_at is None:
+                raise InvalidCursor
+            positions[stream] = (updated_at, uuid.UUID(position[1]))
+        since = parse_datetime(data['since'])
+        if since is None:
+            raise InvalidCursor
+        return positions, since
+    except (binascii.Error, ValueError, AttributeError, IndexError, KeyError, TypeError):
+        raise InvalidCursor
+
+
+def is_expired(positions, since):
+    """
+    Tombstone, который клиент еще не получил, уже перенесен в ArchivedRecord — клиент не узнает
+    об удалении и должен пересинхронизироваться. Не получены удаления новее позиции курсора;
+    из них важны только сделанные после начала синхронизации (since): товары, удаленные раньше,
+    клиент живыми не видел. Возраст позиции сам по себе не важен — в тихом каталоге курсор
+    долго стоит на старой строке и при этом остается полным.
+    """
+    position = positions.get('products')
+    boundary = max(position[0], since) if position else since
+    # `archive_deleted` переносит только tombstone'ы старше ARCHIVE_RETENTION_DAYS — для свежего курсора
+    # архив проверять незачем
+    if boundary > timezone.now() - timedelta(days=getattr(settings, 'ARCHIVE_RETENTION_DAYS', 30)):
+        return False
+    return ArchivedRecord.objects.filter(model=Product._meta.label, deleted_at__gt=boundary).exists()
+
+
+def until():
+    """
+    Upper bound of a page: транзакция могла получить updated_at раньше, а закоммититься позже
+    уже отданных строк — такие изменения не потеряются, если не отдавать самые свежие секунды.
+    """
+    return timezone.now() - timedelta(seconds=getattr(settings, 'CATALOG_CHANGES_LAG', 5))
+
+
+def after(queryset, position, until):
+    """ Rows after `position` up to `until`, a range on the (updated_at, id) index """
+    queryset = queryset.filter(updated_at__lte=until)
+    if position:
+        updated_at, pk = position
+        # диапазон по updated_at берется из индекса, id разбирает только строки с той же меткой
+        queryset = queryset.filter(Q(updated_at__gt=updated_at) | Q(id__gt=pk), updated_at__gte=updated_at)
+    return queryset
+
+
+def has_changes(streams, until):
+    """ One probe for all (queryset, position) streams: UNION ALL of index ranges with LIMIT 1 """
+    probes = [after(queryset, position, until).order_by().values_list('id') for queryset, position in streams]
+    return probes[0].union(*probes[1:], all=True).exists()
+
+
+def fetch(queryset, position, limit, until):
+    """ Rows after `position` in (updated_at, id) order, returns (rows, has_more) """
+    rows = list(after(queryset, position, until).order_by('updated_at', 'id')[:limit + 1])
+    return rows[:limit], len(rows) > limit
@@ -0,0 +1,125 @@
+import os
+import time
+import atexit
+import logging
+import threading
+from collections import Counter
+
+from django.conf        import settings
+from django.db          import DatabaseError, close_old_connections, connection, transaction
+from django.db.models   import Case, F, When, Value
+
+from apps.shop.models       import Product
+from apps.sellers.models    import Seller
+
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """
+    Просмотры товаров копятся в памяти процесса и раз в VIEW_COUNTER_FLUSH_INTERVAL секунд
+    (или при VIEW_COUNTER_MAX_PENDING разных товаров) сбрасываются пачкой:
+    UPDATE ... SET views = views + CASE ... для товаров и их продавцов.
+    При завершении процесса остаток сбрасывается через atexit.
+    Фоновый сброс включает только сервер (core.wsgi / core.asgi вызывают serve()): в тестах и
+    management-командах просмотры копятся до явного flush().
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = Counter()
+        self.pid = None
+        self.serving = False
+        self.wakeup = threading.Event()
+        self.last_flush_seconds = 0.0
+        self.last_batch_size = 0
+
+    def increment(self, slug, n=1):
+        with self.lock:
+            if self.serving and self.pid != os.getpid():
+                self.start()
+            self.pending[slug] += n
+            full = len(self.pending) >= getattr(settings, 'VIEW_COUNTER_MAX_PENDING', 1000)
+        if full:
+            self.wakeup.set()
+
+    def serve(self):
+        """ Enables the flusher thread and the flush at exit, see core.wsgi """
+        self.serving = True
+
+    def start(self):
+        """ Called under lock in every new process (after fork the flusher thread is gone) """
+        self.pid = os.getpid()
+        self.pending = Counter()
+        self.wakeup = threading.Event()
+        threading.Thread(target=self.run, name='view-counter-flusher', daemon=True).start()
+        atexit.register(self.flush_at_exit)
+
+    def run(self):
+        interval = getattr(settings, 'VIEW_COUNTER_FLUSH_INTERVAL', 10)
+        while True:
+            self.wakeup.wait(interval)
+            self.wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("View counter flush failed")
+            finally:
+                close_old_connections()
+
+    def flush_at_exit(self):
+        try:
+            connection.ensure_connection()
+            usable = connection.is_usable()
+        except DatabaseError:
+            usable = False
+        if not usable:
+            logger.warning("Database is unavailable at exit, views of %d products are lost", len(self.pending))
+            return
+        try:
+            self.flush()
+        except DatabaseError as error:
+            logger.warning("Views of %d products are lost at exit: %s", len(self.pending), error)
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, Counter()
+        if not pending:
+            return 0
+
+        started = time.perf_counter()
+        try:
+            rows = Product.objects.unfiltered().filter(slug__in=pending.keys()).values_list('id', 'slug', 'seller_id')
+            product_views = {product_id: pending[slug] for product_id, slug, _ in rows}
+            seller_views = Counter()
+            for _, slug, seller_id in rows:
+                if seller_id:
+                    seller_views[seller_id] += pending[slug]
+
+            with transaction.atomic():
+                add_views(Product.objects.unfiltered(), 'views', product_views)
+                add_views(Seller.objects, 'product_views', seller_views)
+        except Exception:
+            # транзакция откатилась целиком — возвращаем просмотры, следующий сброс их повторит
+            with self.lock:
+                self.pending.update(pending)
+            raise
+
+        self.last_flush_seconds = time.perf_counter() - started
+        self.last_batch_size = len(product_views)
+        logger.info("Flushed views of %d products (%d views) in %.1f ms",
+                    self.last_batch_size, sum(product_views.values()), self.last_flush_seconds * 1000)
+        return self.last_batch_size
+
+
+def add_views(queryset, field, increments):
+    """ One UPDATE ... SET field = field + CASE id WHEN ... THEN n END per batch """
+    if not increments:
+        return
+    queryset.filter(pk__in=increments.keys()).update(**{
+        field: F(field) + Case(*(When(pk=pk, then=Value(n)) for pk, n in increments.items()), default=Value(0)),
+    })
+
+
+view_counter = ViewCounter()
@@ -0,0 +1,84 @@
+from django.conf    import settings
+from django.core    import signing
+
+from apps.shop.models       import Product
+from apps.shop.cart         import cart_store
+from apps.profiles.models   import OrderItem
+
+
+class GuestCart:
+    """
+    Корзина анонимного пользователя в подписанной cookie: [[slug, quantity], ...] в порядке добавления.
+    До логина корзина не пишет ни в БД, ни в кэш; товары проверяются одним запросом по slug.
+    При логине (MyTokenObtainPairView) строки добавляются в корзину пользователя и cookie удаляется.
+    """
+    cookie_name = 'guest_cart'
+    salt = 'apps.shop.guest_cart'
+
+    @property
+    def max_age(self):
+        return getattr(settings, 'GUEST_CART_MAX_AGE', 60 * 60 * 24 * 30)
+
+    @property
+    def max_items(self):
+        return getattr(settings, 'GUEST_CART_MAX_ITEMS', 50)
+
+    def load(self, request):
+        """ {slug: quantity}, empty for a missing, expired or tampered cookie """
+        value = request.COOKIES.get(self.cookie_name)
+        if not value:
+            return {}
+        try:
+            lines = signing.loads(value, salt=self.salt, max_age=self.max_age)
+        except signing.BadSignature:
+            return {}
+        return {
+            slug: quantity for slug, quantity in lines
+            if isinstance(slug, str) and isinstance(quantity, int) and quantity > 0
+        }
+
+    def save(self, response, lines):
+        if not lines:
+            response.delete_cookie(self.cookie_name, samesite='Lax')
+            return
+        value = signing.dumps([[slug, quantity] for slug, quantity in lines.items()], salt=self.salt, compress=True)
+        response.set_cookie(self.cookie_name, value, max_age=self.max_age, httponly=True, samesite='Lax',
+                            secure=not settings.DEBUG)
+
+    def set_quantities(self, lines, quantities):
+        """ Applies {slug: quantity}, returns slugs of newly added products """
+        created = set()
+        for slug, quantity in quantities.items():
+            if slug not in lines:
+                created.add(slug)
+            if quantity:
+                lines[slug] = quantity
+            else:
+                lines.pop(slug, None)
+        return created
+
+    def products(self, slugs):
+        """ Live products by slug, one query """
+        products = Product.objects.select_related('seller', 'seller__user').filter(slug__in=list(slugs))
+        return {product.slug: product for product in products}
+
+    def items(self, lines, products=None):
+        """ Unsaved OrderItem objects, newest first; deleted products are skipped """
+        products = self.products(lines) if products is None else products
+        return [
+            OrderItem(product=products[slug], quantity=quantity)
+            for slug, quantity in reversed(lines.items())
+            if slug in products
+        ]
+
+    def merge(self, request, response, user):
+        """ Moves the guest cart into the user's cart: one product query and one cart write """
+        lines = self.load(request)
+        if not lines:
+            return
+        products = self.products(lines)
+        cart_store.merge(user, {products[slug]: quantity for slug, quantity in lines.items() if slug in products})
+        self.save(response, {})
+
+
+guest_cart = GuestCart()
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base    import BaseCommand
+from django.db                      import transaction
+
+from apps.shop          import ratings
+from apps.shop.models   import Product
+
+
+class Command(BaseCommand):
+    help = ("Recomputes denormalized Product.rating from reviews in batches "
+            "(products reviewed before the column existed sort as 0 under ?ordering=rating). Safe to rerun.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0.1,
+                            help="Seconds to sleep between batches so other writers can take the lock")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        updated = 0
+        # мягко удаленные тоже: после восстановления рейтинг должен быть верным
+        products = Product.objects.unfiltered().order_by('pk')
+        last = None
+        while True:
+            batch = products.filter(pk__gt=last) if last else products
+            ids = list(batch.values_list('pk', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            with transaction.atomic():
+                updated += ratings.refresh(Product.objects.unfiltered().filter(pk__in=ids))
+            last = ids[-1]
+            time.sleep(options['pause'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"Updated rating of {updated} products in {elapsed:.1f}s")
@@ -0,0 +1,78 @@
+import time
+import uuid
+import random
+
+from django.core.management.base    import BaseCommand
+from django.db                      import connection, transaction
+from django.test                    import RequestFactory
+from django.utils                   import timezone
+
+from apps.shop.models   import Category, Product
+from apps.shop.cache    import category_cache
+from apps.shop.views    import CategoriesView
+
+
+def fast_insert(model, objs):
+    """ executemany without Field.pre_save: AutoSlugField would run a uniqueness query per row """
+    fields = [field for field in model._meta.concrete_fields]
+    sql = "INSERT INTO %s (%s) VALUES (%s)" % (
+        connection.ops.quote_name(model._meta.db_table),
+        ', '.join(connection.ops.quote_name(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    rows = [[field.get_db_prep_save(getattr(obj, field.attname), connection) for field in fields] for obj in objs]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+class Command(BaseCommand):
+    help = "Benchmarks CategoriesView aggregate query and cached response on generated data (rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', type=int, default=10_000)
+        parser.add_argument('--products', type=int, default=1_000_000)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.generate(options)
+            self.measure()
+            transaction.set_rollback(True)
+        category_cache.invalidate()
+
+    def generate(self, options):
+        started = time.perf_counter()
+        now = timezone.now()
+        category_ids = [uuid.uuid4() for _ in range(options['categories'])]
+        fast_insert(Category, [
+            Category(id=category_id, name=f"bench-{category_id.hex}", slug=f"bench-{category_id.hex}",
+                     image='bench.jpg', created_at=now, updated_at=now)
+            for category_id in category_ids
+        ])
+        for offset in range(0, options['products'], options['batch_size']):
+            fast_insert(Product, [
+                Product(
+                    id=product_id, name='bench', slug=f"bench-{product_id.hex}", desc='', price_current=random.randint(1, 10_000),
+                    category_id=random.choice(category_ids), in_stock=random.randint(0, 5), image1='bench.jpg',
+                    is_deleted=random.random() < 0.05, created_at=now, updated_at=now,
+                )
+                for product_id in (uuid.uuid4() for _ in range(min(options['batch_size'], options['products'] - offset)))
+            ])
+        self.stdout.write(f"Generated {options['categories']} categories, {options['products']} products "
+                          f"in {time.perf_counter() - started:.1f}s")
+
+    def measure(self):
+        view = CategoriesView.as_view()
+        request = RequestFactory().get('/shop/categories/')
+
+        category_cache.invalidate()
+        started = time.perf_counter()
+        response = view(request)
+        self.stdout.write(f"cold (aggregate query): {(time.perf_counter() - started) * 1000:8.1f} ms, "
+                          f"{len(response.data)} categories")
+
+        runs = 100
+        started = time.perf_counter()
+        for _ in range(runs):
+            view(request)
+        self.stdout.write(f"cached:                 {(time.perf_counter() - started) / runs * 1000:8.2f} ms")
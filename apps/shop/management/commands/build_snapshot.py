@@ -0,0 +1,18 @@
+import time
+
+from django.conf                    import settings
+from django.core.management.base    import BaseCommand
+
+from apps.shop import snapshot
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the mmap'd catalog snapshot served to anonymous catalog requests"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=None, help=f"Defaults to SNAPSHOT_PATH ({settings.SNAPSHOT_PATH})")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = snapshot.build(options['path'])
+        self.stdout.write(f"Snapshot with {count} products written in {time.perf_counter() - started:.2f}s")
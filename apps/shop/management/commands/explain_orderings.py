@@ -0,0 +1,59 @@
+from django.core.management.base    import BaseCommand, CommandError
+from django.db                      import connection, transaction
+
+from apps.shop.filters  import ProductFilter
+from apps.shop.models   import Product
+from apps.shop.views    import PRODUCT_ORDERINGS
+
+
+# признак сортировки в плане запроса (а не чтения уже упорядоченного индекса)
+SORT_MARKERS = {
+    'sqlite': 'USE TEMP B-TREE FOR ORDER BY',
+    'postgresql': 'Sort',
+    'mysql': 'filesort',
+}
+
+# (название, параметры ProductFilter, колонка диапазона или None); те же проверки — в apps/shop/tests.py
+CASES = [
+    ('no filters', {}, None),
+    ('in_stock', {'in_stock': 1}, None),
+    ('price range', {'min_price': 10, 'max_price': 1000}, 'price_current'),
+    ('created_at', {'created_at': '2025-01-01T00:00:00Z'}, 'created_at'),
+]
+
+
+class Command(BaseCommand):
+    help = "Checks with EXPLAIN that every ProductsView ?ordering= is served from an index without a sort step"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help="Print full plans")
+
+    def handle(self, *args, **options):
+        marker = SORT_MARKERS.get(connection.vendor)
+        if marker is None:
+            raise CommandError(f"Unsupported database vendor: {connection.vendor}")
+
+        failed = []
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # на маленькой таблице планировщик выбрал бы seq scan + sort; проверяем, что индекс в принципе подходит
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+            for name, ordering in PRODUCT_ORDERINGS.items():
+                if name == 'trending':
+                    continue
+                for label, params, range_column in CASES:
+                    queryset = ProductFilter(params, queryset=Product.objects.order_by(*ordering)).qs
+                    plan = queryset.explain()
+                    sorted_in_index = marker not in plan
+                    # диапазон по другой колонке: планировщик вправе выбрать ее индекс + сортировку,
+                    # один индекс не покрывает оба случая, поэтому это не ошибка
+                    required = range_column in (None, ordering[0].lstrip('-'))
+                    if not sorted_in_index and required:
+                        failed.append(f"{name} / {label}")
+                    status = 'ok  ' if sorted_in_index else ('SORT' if required else 'sort')
+                    self.stdout.write(f"{status} {name:<8} {label}")
+                    if options['verbose_plans'] or (not sorted_in_index and required):
+                        self.stdout.write('    ' + plan.replace('\n', '\n    '))
+        if failed:
+            raise CommandError(f"Orderings need a sort step: {', '.join(failed)}")
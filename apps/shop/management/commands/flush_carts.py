@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.shop.cart import cart_store
+
+
+class Command(BaseCommand):
+    help = "Persists dirty carts into OrderItem (run periodically, e.g. from cron)"
+
+    def handle(self, *args, **options):
+        flushed = cart_store.flush_dirty()
+        self.stdout.write(f"Flushed {flushed} cart(s)")
@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.shop import recommendations
+
+
+class Command(BaseCommand):
+    help = "Updates 'customers also bought' top-k table from checked-out OrderItem rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Recount from all orders instead of new ones only")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        orders, products = recommendations.refresh(full=options['full'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"Processed {orders} orders, updated {products} products in {elapsed:.2f}s")
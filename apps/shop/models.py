@@ -16,6 +16,9 @@ class Category(BaseModel):
 
     class Meta:
         verbose_name_plural = 'Categories'
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='category_changes_idx'),  # /shop/changes/
+        ]
 
 
 class Product(IsDeletedModel):
@@ -32,9 +35,26 @@ class Product(IsDeletedModel):
     image2 = models.ImageField(upload_to='product_images/', blank=True)
     image3 = models.ImageField(upload_to='product_images/', blank=True)
 
+    # log экспоненциально затухающей популярности, см. apps.shop.trending
+    trending_score = models.FloatField(default=0)
+    views = models.PositiveBigIntegerField(default=0)  # сбрасывается пачками, см. apps.shop.counters
+    rating = models.FloatField(default=0)  # средняя оценка для сортировки, см. apps.shop.ratings
+
     def __str__(self):
         return str(self.name)
 
+    class Meta(IsDeletedModel.Meta):
+        indexes = [
+            models.Index(fields=['-trending_score']),
+            models.Index(fields=['category', '-trending_score']),
+            # ?ordering= в ProductsView: is_deleted (фильтр менеджера) + колонка сортировки + id для
+            # стабильного порядка при равных значениях; in_stock в хвосте — фильтр проверяется по индексу
+            models.Index(fields=['is_deleted', 'price_current', 'id', 'in_stock'], name='product_price_idx'),
+            models.Index(fields=['is_deleted', 'created_at', 'id', 'in_stock'], name='product_newest_idx'),
+            models.Index(fields=['is_deleted', 'rating', 'id', 'in_stock'], name='product_rating_idx'),
+            models.Index(fields=['updated_at', 'id'], name='product_changes_idx'),  # /shop/changes/
+        ]
+
 
 RATING_CHOICES = (
     (1, 1),
@@ -52,3 +72,45 @@ class Review(IsDeletedModel):
 
     def __str__(self):
         return f"{self.user}'s comment"
+
+    class Meta(IsDeletedModel.Meta):
+        indexes = [
+            models.Index(fields=['product', 'is_deleted', 'created_at', 'id']),
+            models.Index(fields=['product', 'is_deleted', 'rating', 'created_at', 'id']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'product'], condition=models.Q(is_deleted=False), name='unique_active_review',
+            ),
+        ]
+
+
+class Cart(models.Model):
+    """
+    Write-behind cart, see apps.shop.cart: one row per user, written with a single UPDATE per change.
+    version — оптимистическая блокировка, dirty — строки еще не сброшены в OrderItem.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    lines = models.JSONField(default=list)  # [[product_id, quantity], ...] в порядке добавления
+    version = models.PositiveIntegerField(default=0)
+    dirty = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['dirty'], condition=models.Q(dirty=True), name='cart_dirty_idx'),
+        ]
+
+
+class CoPurchase(models.Model):
+    """ Top-k "customers also bought" neighbours per product, see apps.shop.recommendations """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='co_purchases')
+    recommended = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    score = models.PositiveIntegerField(default=0)  # orders with both products
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'recommended'], name='unique_co_purchase'),
+        ]
+        indexes = [
+            models.Index(fields=['product', '-score']),
+        ]
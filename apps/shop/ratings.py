@@ -0,0 +1,22 @@
+from django.db.models               import Avg, FloatField, OuterRef, Subquery, Value
+from django.db.models.functions     import Coalesce
+from django.utils                   import timezone
+
+from apps.shop.models import Review
+
+
+def refresh(products):
+    """
+    Пересчитывает денормализованный Product.rating (средняя оценка живых отзывов)
+    одним UPDATE для всех товаров queryset'а: refresh(Product.objects.filter(slug=slug)).
+    """
+    average = (
+        Review.objects.filter(product=OuterRef('pk'))
+        .values('product')
+        .annotate(average=Avg('rating'))
+        .values('average')
+    )
+    return products.update(
+        rating=Coalesce(Subquery(average, output_field=FloatField()), Value(0.0)),
+        updated_at=timezone.now(),  # рейтинг входит в карточку товара — изменение для ленты /shop/changes/
+    )
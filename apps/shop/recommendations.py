@@ -0,0 +1,137 @@
+from collections    import Counter, defaultdict
+from datetime       import timedelta
+from itertools      import groupby, permutations
+
+from django.conf    import settings
+from django.db      import transaction
+from django.utils   import timezone
+
+from apps.common.models     import Checkpoint
+from apps.shop.models       import CoPurchase
+from apps.profiles.models   import OrderItem
+
+
+# Со scipy матрица совместных покупок — Bᵀ·B разреженной матрицы заказ × товар, top-k выбирается
+# по ее строкам в numpy, и в Python попадают только выбранные пары. Без scipy — счетчик пар,
+# квадратичный по размеру заказа.
+try:
+    import numpy
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+
+CHECKPOINT_NAME = 'recommendations'
+
+
+class CoOccurrence:
+    """ Co-occurrence counts of (order_id, product_id) rows; products — those of the counted orders """
+
+    def __init__(self, rows):
+        self.index = {}  # product_id -> номер строки/столбца
+        orders, order_index, product_index = {}, [], []
+        for order_id, product_id in rows:
+            order_index.append(orders.setdefault(order_id, len(orders)))
+            product_index.append(self.index.setdefault(product_id, len(self.index)))
+        self.products = list(self.index)
+
+        if sparse is None:
+            self.pairs = Counter()
+            for _, items in groupby(zip(order_index, product_index), key=lambda item: item[0]):
+                self.pairs.update(permutations({column for _, column in items}, 2))
+            return
+
+        incidence = sparse.csr_matrix(
+            (numpy.ones(len(order_index), dtype=numpy.int64), (order_index, product_index)),
+            shape=(len(orders), len(self.products)),
+        )
+        incidence.data[:] = 1  # повторы товара в заказе сложились при построении — пара считается раз на заказ
+        self.pairs = (incidence.T @ incidence).tocsr()
+        self.pairs.setdiag(0)
+        self.pairs.eliminate_zeros()
+
+    def top(self, existing, top_k):
+        """ existing: {(product_id, recommended_id): score} added to the counts -> {product_id: {recommended_id: score}} """
+        # existing загружены для товаров этих заказов, новые столбцы — только у рекомендованных
+        for _, recommended_id in existing:
+            self.index.setdefault(recommended_id, len(self.index))
+        ids = list(self.index)
+        rows = len(self.products)
+
+        if sparse is None:
+            scores = defaultdict(dict)
+            for (row, column), count in self.pairs.items():
+                scores[ids[row]][ids[column]] = count
+            for (product_id, recommended_id), score in existing.items():
+                scores[product_id][recommended_id] = scores[product_id].get(recommended_id, 0) + score
+            return {
+                product_id: dict(sorted(neighbours.items(), key=lambda item: -item[1])[:top_k])
+                for product_id, neighbours in scores.items()
+            }
+
+        matrix = sparse.csr_matrix((self.pairs.data, self.pairs.indices, self.pairs.indptr), shape=(rows, len(ids)))
+        if existing:
+            row, column = zip(*((self.index[product_id], self.index[recommended_id]) for product_id, recommended_id in existing))
+            matrix = matrix + sparse.csr_matrix((list(existing.values()), (row, column)), shape=matrix.shape)
+
+        result = {}
+        for row in range(rows):
+            start, end = matrix.indptr[row], matrix.indptr[row + 1]
+            columns, counts = matrix.indices[start:end], matrix.data[start:end]
+            if len(counts) > top_k:
+                keep = numpy.argpartition(-counts, top_k - 1)[:top_k]
+                columns, counts = columns[keep], counts[keep]
+            if len(counts):
+                result[ids[row]] = dict(zip([ids[column] for column in columns.tolist()], counts.tolist()))
+        return result
+
+
+def refresh(full=False):
+    """
+    Adds co-occurrences of orders placed since the last run and keeps top-k per product.
+    Incremental runs are approximate for pairs that fell out of the top-k earlier, full=True recounts everything.
+    Returns (orders processed, products updated).
+    """
+    top_k = getattr(settings, 'RECOMMENDATIONS_TOP_K', 10)
+    checkpoint, _ = Checkpoint.objects.get_or_create(name=CHECKPOINT_NAME)
+    # небольшой лаг: заказ создается до того, как к нему привязываются позиции корзины
+    until = timezone.now() - timedelta(minutes=1)
+
+    items = OrderItem.objects.filter(order__created_at__lte=until)
+    if not full and checkpoint.position:
+        items = items.filter(order__created_at__gt=checkpoint.position)
+    rows = items.order_by('order_id').values_list('order_id', 'product_id')
+    counts = CoOccurrence(rows.iterator(chunk_size=5000))
+    orders = items.values('order_id').distinct().count()
+
+    with transaction.atomic():
+        if full:
+            CoPurchase.objects.all().delete()
+            existing = {}
+        else:
+            existing = {
+                (row.product_id, row.recommended_id): row
+                for row in CoPurchase.objects.filter(product_id__in=counts.products)
+            }
+        top = counts.top({pair: row.score for pair, row in existing.items()}, top_k)
+
+        to_create, to_update = [], []
+        for product_id, neighbours in top.items():
+            for recommended_id, score in neighbours.items():
+                row = existing.get((product_id, recommended_id))
+                if row is None:
+                    to_create.append(CoPurchase(product_id=product_id, recommended_id=recommended_id, score=score))
+                elif row.score != score:
+                    row.score = score
+                    to_update.append(row)
+        to_delete = [
+            row.pk for (product_id, recommended_id), row in existing.items()
+            if recommended_id not in top.get(product_id, {})
+        ]
+
+        CoPurchase.objects.filter(pk__in=to_delete).delete()
+        CoPurchase.objects.bulk_create(to_create, batch_size=1000)
+        CoPurchase.objects.bulk_update(to_update, ['score'], batch_size=1000)
+        checkpoint.position = until
+        checkpoint.save()
+    return orders, len(top)
@@ -3,6 +3,31 @@ from drf_spectacular.utils import OpenApiParameter, OpenApiTypes
 from core import settings
 
 
+PRODUCT_FIELDS_PARAM_EXAMPLE = [
+    OpenApiParameter(
+        name="fields",
+        description="Comma-separated product fields to return, e.g. name,slug,price_current,image1",
+        required=False,
+        type=OpenApiTypes.STR,
+    ),
+    OpenApiParameter(
+        name="exclude",
+        description="Comma-separated product fields to leave out, e.g. desc,rating",
+        required=False,
+        type=OpenApiTypes.STR,
+    ),
+]
+
+PRODUCT_ORDERING_PARAM_EXAMPLE = [
+    OpenApiParameter(
+        name="ordering",
+        description="Sort products: price (ascending), -price (descending), newest, rating or trending",
+        required=False,
+        type=OpenApiTypes.STR,
+        enum=["price", "-price", "newest", "rating", "trending"],
+    ),
+]
+
 PRODUCT_PARAM_EXAMPLE = [
     OpenApiParameter(
         name="max_price",
@@ -40,4 +65,79 @@ PRODUCT_PARAM_EXAMPLE = [
         required=False,
         type=OpenApiTypes.INT,
     ),
-]
\ No newline at end of file
+    *PRODUCT_ORDERING_PARAM_EXAMPLE,
+    *PRODUCT_FIELDS_PARAM_EXAMPLE,
+]
+
+
+REVIEW_PARAM_EXAMPLE = [
+    OpenApiParameter(
+        name="ordering",
+        description="Sort reviews: newest (default) or rating",
+        required=False,
+        type=OpenApiTypes.STR,
+        enum=["newest", "rating"],
+    ),
+    OpenApiParameter(
+        name="rating",
+        description="Filter reviews by star value",
+        required=False,
+        type=OpenApiTypes.INT,
+    ),
+    OpenApiParameter(
+        name="cursor",
+        description="Cursor from the previous page's next/previous link",
+        required=False,
+        type=OpenApiTypes.STR,
+    ),
+    OpenApiParameter(
+        name='page_size',
+        description="An amount per page you want to display. Defaults to 10",
+        required=False,
+        type=OpenApiTypes.INT,
+    ),
+]
+
+
+CHANGES_PARAM_EXAMPLE = [
+    OpenApiParameter(
+        name="cursor",
+        description="Cursor from the previous response, omit for the initial full sync",
+        required=False,
+        type=OpenApiTypes.STR,
+    ),
+    OpenApiParameter(
+        name="limit",
+        description="Max rows per stream (categories, products). Defaults to 100, max 500",
+        required=False,
+        type=OpenApiTypes.INT,
+    ),
+]
+
+
+IDEMPOTENCY_PARAM_EXAMPLE = [
+    OpenApiParameter(
+        name="Idempotency-Key",
+        description="Unique key of the operation (e.g. UUID). Retries with the same key get the first response "
+                    "with the Idempotent-Replayed header instead of running the request again",
+        required=False,
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.HEADER,
+    ),
+]
+
+
+AUTOCOMPLETE_PARAM_EXAMPLE = [
+    OpenApiParameter(
+        name="q",
+        description="What the user has typed so far, matched as a prefix of any word in the name",
+        required=True,
+        type=OpenApiTypes.STR,
+    ),
+    OpenApiParameter(
+        name="limit",
+        description="Max suggestions. Defaults to 10, max 20",
+        required=False,
+        type=OpenApiTypes.INT,
+    ),
+]
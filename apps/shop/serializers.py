@@ -1,9 +1,11 @@
 from rest_framework         import serializers
+from drf_spectacular.types  import OpenApiTypes
 from drf_spectacular.utils  import extend_schema_field
 
+from apps.common.serializers    import SparseFieldsMixin
 from apps.sellers.serializers   import SellerSerializer
 from apps.profiles.serializers  import ShippingAddressSerializer, ProfileSerializer
-from apps.shop.models           import RATING_CHOICES, Review
+from apps.shop.models           import RATING_CHOICES
 
 
 class CategorySerializer(serializers.Serializer):
@@ -12,13 +14,35 @@ class CategorySerializer(serializers.Serializer):
     image = serializers.ImageField()
 
 
+class CategoryStatsSerializer(CategorySerializer):
+    product_count = serializers.IntegerField(read_only=True)
+    in_stock_count = serializers.IntegerField(read_only=True)
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+
+
 class SellerShopSerializer(serializers.Serializer):
     name = serializers.CharField(source="business_name")
     slug = serializers.CharField()
     avatar = serializers.CharField(source="user.avatar")
 
 
-class ProductSerializer(serializers.Serializer):
+class ProductSerializer(SparseFieldsMixin, serializers.Serializer):
+    field_sources = {
+        'seller': ['seller__business_name', 'seller__slug', 'seller__user__avatar'],
+        'name': ['name'],
+        'rating': ['rating'],
+        'slug': ['slug'],
+        'desc': ['desc'],
+        'price_old': ['price_old'],
+        'price_current': ['price_current'],
+        'category': ['category__name', 'category__slug', 'category__image'],
+        'in_stock': ['in_stock'],
+        'image1': ['image1'],
+        'image2': ['image2'],
+        'image3': ['image3'],
+    }
+
     seller = SellerShopSerializer()
     name = serializers.CharField()
     rating = serializers.SerializerMethodField()
@@ -32,13 +56,10 @@ class ProductSerializer(serializers.Serializer):
     image2 = serializers.ImageField(required=False)
     image3 = serializers.ImageField(required=False)
 
+    @extend_schema_field(OpenApiTypes.FLOAT)
     def get_rating(self, obj):
-        reviews = Review.objects.filter(product__slug=obj.slug).only('rating')
-        count = reviews.count()
-        if count == 0:
-            return 0
-        rating_sum = sum(review.rating for review in reviews)
-        return round(rating_sum / count, 1)
+        # денормализованный Product.rating, см. apps.shop.ratings
+        return round(obj.rating, 1) if obj.rating else 0
 
 
 class CreateProductSerializer(serializers.Serializer):
@@ -52,6 +73,40 @@ class CreateProductSerializer(serializers.Serializer):
     image3 = serializers.ImageField(required=False)
 
 
+class ProductBatchSerializer(serializers.Serializer):
+    slugs = serializers.ListField(child=serializers.SlugField(), allow_empty=False, max_length=300)
+
+
+class SuggestionSerializer(serializers.Serializer):
+    type = serializers.ChoiceField(choices=['product', 'category', 'seller'])
+    name = serializers.CharField()
+    slug = serializers.SlugField()
+
+
+class CategoryChangeSerializer(CategorySerializer):
+    id = serializers.UUIDField(read_only=True)
+    updated_at = serializers.DateTimeField(read_only=True)
+
+
+class ProductChangeSerializer(ProductSerializer):
+    id = serializers.UUIDField(read_only=True)
+    updated_at = serializers.DateTimeField(read_only=True)
+
+
+class TombstoneSerializer(serializers.Serializer):
+    id = serializers.UUIDField()
+    slug = serializers.SlugField()
+    deleted_at = serializers.DateTimeField()
+
+
+class CatalogChangesSerializer(serializers.Serializer):
+    categories = CategoryChangeSerializer(many=True)
+    products = ProductChangeSerializer(many=True)
+    deleted_products = TombstoneSerializer(many=True)
+    cursor = serializers.CharField()
+    has_more = serializers.BooleanField()
+
+
 class OrderItemProductSerializer(serializers.Serializer):
     seller = SellerSerializer()
     name = serializers.CharField()
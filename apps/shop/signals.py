@@ -0,0 +1,50 @@
+from django.db.models.signals   import post_save, post_delete
+from django.dispatch            import receiver
+
+from apps.shop.models       import Category, Product, Review
+from apps.sellers.models    import Seller
+from apps.shop.cache        import product_cache, category_cache
+from apps.shop.snapshot     import snapshot_store
+from apps.shop.autocomplete import autocomplete
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_product_cache(sender, instance, **kwargs):
+    product_cache.invalidate(instance.slug)
+    category_cache.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_category_cache(sender, instance, **kwargs):
+    category_cache.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Seller)
+@receiver([post_save, post_delete], sender=Review)
+def schedule_snapshot_rebuild(sender, instance, **kwargs):
+    snapshot_store.schedule_rebuild()
+
+
+@receiver(post_save, sender=Product)
+def update_product_suggestions(sender, instance, **kwargs):
+    autocomplete.update('product', instance.pk, instance.name, instance.slug, instance.views, live=not instance.is_deleted)
+
+
+@receiver(post_save, sender=Category)
+def update_category_suggestions(sender, instance, **kwargs):
+    autocomplete.update('category', instance.pk, instance.name, instance.slug)
+
+
+@receiver(post_save, sender=Seller)
+def update_seller_suggestions(sender, instance, **kwargs):
+    autocomplete.update('seller', instance.pk, instance.business_name, instance.slug, instance.product_views,
+                        live=instance.is_approved)
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Seller)
+def remove_suggestions(sender, instance, **kwargs):
+    autocomplete.update(sender._meta.model_name, instance.pk, None, None, live=False)
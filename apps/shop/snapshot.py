@@ -0,0 +1,358 @@
+import os
+import json
+import mmap
+import time
+import array
+import bisect
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf                import settings
+from django.core.cache          import cache
+from django.db.models           import Count, Sum
+from django.utils               import timezone
+
+from apps.shop.models       import Category, Product, Review
+from apps.sellers.models    import Seller
+
+
+# Снимок каталога для анонимного чтения: все живые товары в одном файле, по колонкам.
+# Числа — массивы int64 (цены в копейках), строки — offsets + utf-8 blob, категории и продавцы —
+# словари, на которые ссылаются номера в колонках товара. Индексы: постинги по категории и продавцу,
+# перестановки строк для каждой сортировки PRODUCT_ORDERINGS (по цене — еще и для диапазона цен),
+# отсортированные по slug номера строк. Строки лежат в порядке по умолчанию ('-id').
+#
+# Файл пишется во временный и подменяется через os.replace, воркеры mmap'ят его read-only —
+# страницы общие для всех процессов через page cache, разбора при загрузке нет.
+
+MAGIC = b'DRFSNAP1'
+MICROSECOND = timedelta(microseconds=1)
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+PRODUCT_FIELDS = ('seller', 'name', 'rating', 'slug', 'desc', 'price_old', 'price_current',
+                  'category', 'in_stock', 'image1', 'image2', 'image3')
+
+
+def to_micros(value):
+    return (value - EPOCH) // MICROSECOND
+
+
+def to_cents(value):
+    return int(value * 100)
+
+
+def render_cents(cents):
+    """ Same as DecimalField(decimal_places=2) output """
+    return f"{cents // 100}.{cents % 100:02d}"
+
+
+def align(offset):
+    return (offset + 7) & ~7
+
+
+class StringColumn:
+    def __init__(self):
+        self.offsets = array.array('q', [0])
+        self.data = bytearray()
+
+    def append(self, value):
+        self.data += (value or '').encode()
+        self.offsets.append(len(self.data))
+
+
+def write(path, sections, built_at):
+    """ Writes {name: array | bytes} sections and atomically replaces `path` """
+    layout, offset = {}, 0
+    for name, values in sections.items():
+        typecode = values.typecode if isinstance(values, array.array) else 'B'
+        size = len(values) * (values.itemsize if isinstance(values, array.array) else 1)
+        layout[name] = [offset, size, typecode]
+        offset = align(offset + size)
+    header = json.dumps({'built_at': built_at, 'sections': layout}).encode()
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(MAGIC + len(header).to_bytes(4, 'little') + header)
+        base = align(file.tell())
+        for name, values in sections.items():
+            file.seek(base + layout[name][0])
+            file.write(values)
+        file.truncate(base + offset)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+def build(path=None):
+    """ Dumps live products into a snapshot file, returns the number of products """
+    from apps.shop.views import PRODUCT_ORDERINGS
+
+    path = path or settings.SNAPSHOT_PATH
+    built_at = time.time()
+    image_url = Product._meta.get_field('image1').storage.url
+    category_image_url = Category._meta.get_field('image').storage.url
+
+    ratings = {
+        product_id: (rating_sum, count)
+        for product_id, rating_sum, count in Review.objects.values('product_id')
+        .annotate(rating_sum=Sum('rating'), count=Count('id'))
+        .values_list('product_id', 'rating_sum', 'count')
+    }
+
+    categories = {}
+    category_columns = {name: StringColumn() for name in ('name', 'slug', 'image')}
+    for category_id, name, slug, image in Category.objects.order_by('id').values_list('id', 'name', 'slug', 'image'):
+        categories[category_id] = len(categories)
+        category_columns['name'].append(name)
+        category_columns['slug'].append(slug)
+        category_columns['image'].append(category_image_url(image) if image else '')
+
+    rows = {}
+    numbers = {name: array.array('q') for name in (
+        'price_current', 'price_old', 'in_stock', 'created_at', 'rating_sum', 'rating_count', 'category', 'seller',
+    )}
+    strings = {name: StringColumn() for name in ('name', 'slug', 'desc', 'image1', 'image2', 'image3')}
+    seller_ids = {}
+    products = Product.objects.order_by('-id').values_list(
+        'id', 'seller_id', 'name', 'slug', 'desc', 'price_old', 'price_current', 'category_id', 'in_stock',
+        'image1', 'image2', 'image3', 'created_at',
+    )
+    for (product_id, seller_id, name, slug, desc, price_old, price_current, category_id, in_stock,
+         image1, image2, image3, created_at) in products.iterator(chunk_size=5000):
+        rows[product_id] = len(rows)
+        rating_sum, rating_count = ratings.get(product_id, (0, 0))
+        numbers['price_current'].append(to_cents(price_current))
+        numbers['price_old'].append(-1 if price_old is None else to_cents(price_old))
+        numbers['in_stock'].append(in_stock)
+        numbers['created_at'].append(to_micros(created_at))
+        numbers['rating_sum'].append(rating_sum)
+        numbers['rating_count'].append(rating_count)
+        numbers['category'].append(categories[category_id])
+        numbers['seller'].append(-1 if seller_id is None else seller_ids.setdefault(seller_id, len(seller_ids)))
+        strings['name'].append(name)
+        strings['slug'].append(slug)
+        strings['desc'].append(desc)
+        for column, image in (('image1', image1), ('image2', image2), ('image3', image3)):
+            strings[column].append(image_url(image) if image else '')
+
+    # продавцы без фильтра is_deleted/approved — как select_related в ProductSerializer
+    seller_columns = {name: StringColumn() for name in ('name', 'slug', 'avatar')}
+    seller_values = {
+        seller_id: (name, slug, avatar)
+        for seller_id, name, slug, avatar in Seller._base_manager.filter(id__in=seller_ids)
+        .values_list('id', 'business_name', 'slug', 'user__avatar')
+    }
+    for seller_id in seller_ids:
+        name, slug, avatar = seller_values[seller_id]
+        seller_columns['name'].append(name)
+        seller_columns['slug'].append(slug)
+        seller_columns['avatar'].append(avatar)
+
+    sections = {}
+    for name, column in numbers.items():
+        sections[name] = column
+    for prefix, columns in (('', strings), ('category.', category_columns), ('seller.', seller_columns)):
+        for name, column in columns.items():
+            sections[f'{prefix}{name}.offsets'] = column.offsets
+            sections[f'{prefix}{name}.data'] = column.data
+
+    for key, size in (('category', len(categories)), ('seller', len(seller_ids))):
+        postings = [[] for _ in range(size)]
+        for row, value in enumerate(numbers[key]):
+            if value >= 0:
+                postings[value].append(row)
+        offsets = array.array('q', [0])
+        for group in postings:
+            offsets.append(offsets[-1] + len(group))
+        sections[f'by_{key}.offsets'] = offsets
+        sections[f'by_{key}.rows'] = array.array('q', (row for group in postings for row in group))
+
+    slugs = [strings['slug'].data[strings['slug'].offsets[row]:strings['slug'].offsets[row + 1]].decode()
+             for row in range(len(rows))]
+    sections['by_slug'] = array.array('q', sorted(range(len(rows)), key=slugs.__getitem__))
+
+    # порядок сортировок берем у БД — те же правила сравнения, что у ORM-пути
+    for key, ordering in PRODUCT_ORDERINGS.items():
+        order = array.array('q', (
+            rows[product_id] for product_id in
+            Product.objects.order_by(*ordering).values_list('id', flat=True).iterator(chunk_size=5000)
+            if product_id in rows
+        ))
+        rank = array.array('q', bytes(8 * len(order)))
+        for position, row in enumerate(order):
+            rank[row] = position
+        sections[f'order.{key}'] = order
+        sections[f'rank.{key}'] = rank
+
+    write(path, sections, built_at)
+    return len(rows)
+
+
+class CatalogSnapshot:
+    """ Read-only view over a snapshot file """
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(self.mmap)
+        if buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot")
+        size = int.from_bytes(buffer[8:12], 'little')
+        header = json.loads(bytes(buffer[12:12 + size]))
+        base = align(12 + size)
+        self.built_at = header['built_at']
+        self.columns = {
+            name: buffer[base + offset:base + offset + length].cast(typecode)
+            for name, (offset, length, typecode) in header['sections'].items()
+        }
+        self.count = len(self.columns['price_current'])
+        self.categories = {self.string('category.slug', i): i for i in range(len(self.columns['category.slug.offsets']) - 1)}
+        self.sellers = {self.string('seller.slug', i): i for i in range(len(self.columns['seller.slug.offsets']) - 1)}
+
+    def string(self, column, index):
+        offsets = self.columns[f'{column}.offsets']
+        return str(self.columns[f'{column}.data'][offsets[index]:offsets[index + 1]], 'utf-8')
+
+    def image(self, column, index):
+        return self.string(column, index) or None
+
+    def find(self, slug):
+        """ Row of the product with this slug or None """
+        by_slug = self.columns['by_slug']
+        position = bisect.bisect_left(by_slug, slug, key=lambda row: self.string('slug', row))
+        if position < len(by_slug) and self.string('slug', by_slug[position]) == slug:
+            return by_slug[position]
+        return None
+
+    def postings(self, key, index):
+        offsets = self.columns[f'by_{key}.offsets']
+        return self.columns[f'by_{key}.rows'][offsets[index]:offsets[index + 1]]
+
+    def product_rows(self, category=None, seller=None, filters=None, ordering=None):
+        """
+        Row numbers in the order the ORM would return them.
+        filters — cleaned_data ProductFilter (max_price, min_price, in_stock, created_at).
+        """
+        filters = filters or {}
+        price = self.columns['price_current']
+        min_price, max_price = filters.get('min_price'), filters.get('max_price')
+        checks = []
+        if filters.get('in_stock') is not None:
+            in_stock, min_stock = self.columns['in_stock'], filters['in_stock']
+            checks.append(lambda row: in_stock[row] >= min_stock)
+        if filters.get('created_at') is not None:
+            created_at, since = self.columns['created_at'], to_micros(filters['created_at'])
+            checks.append(lambda row: created_at[row] >= since)
+
+        by_row_order = True
+        if category is not None or seller is not None:
+            rows = self.postings('category', category) if category is not None else self.postings('seller', seller)
+        elif min_price is not None or max_price is not None:
+            # диапазон цен — срез индекса по цене, остальные условия проверяются построчно
+            by_price = self.columns['order.price']
+            start = bisect.bisect_left(by_price, min_price * 100, key=price.__getitem__) if min_price is not None else 0
+            end = (bisect.bisect_right(by_price, max_price * 100, key=price.__getitem__)
+                   if max_price is not None else len(by_price))
+            rows, min_price, max_price = by_price[start:end], None, None
+            by_row_order = False
+        else:
+            rows = range(self.count)
+        if min_price is not None:
+            checks.append(lambda row: price[row] >= min_price * 100)
+        if max_price is not None:
+            checks.append(lambda row: price[row] <= max_price * 100)
+
+        if ordering and not checks and isinstance(rows, range):
+            return self.columns[f'order.{ordering}']
+        if checks:
+            rows = [row for row in rows if all(check(row) for check in checks)]
+        if ordering:
+            return sorted(rows, key=self.columns[f'rank.{ordering}'].__getitem__)
+        return rows if by_row_order else sorted(rows)
+
+    def product(self, row, fields=None):
+        """ ProductSerializer(product).data without the database """
+        columns = self.columns
+        seller = columns['seller'][row]
+        category = columns['category'][row]
+        rating_count = columns['rating_count'][row]
+        price_old = columns['price_old'][row]
+        data = {
+            'seller': {
+                'name': self.string('seller.name', seller),
+                'slug': self.string('seller.slug', seller) or None,
+                'avatar': self.string('seller.avatar', seller),
+            } if seller >= 0 else None,
+            'name': self.string('name', row),
+            'rating': round(columns['rating_sum'][row] / rating_count, 1) if rating_count else 0,
+            'slug': self.string('slug', row),
+            'desc': self.string('desc', row),
+            'price_old': render_cents(price_old) if price_old >= 0 else None,
+            'price_current': render_cents(columns['price_current'][row]),
+            'category': {
+                'name': self.string('category.name', category),
+                'slug': self.string('category.slug', category),
+                'image': self.image('category.image', category),
+            },
+            'in_stock': columns['in_stock'][row],
+            'image1': self.image('image1', row),
+            'image2': self.image('image2', row),
+            'image3': self.image('image3', row),
+        }
+        if fields is not None:
+            return {name: data[name] for name in PRODUCT_FIELDS if name in fields}
+        return data
+
+
+class SnapshotStore:
+    """
+    Current snapshot of this process. Файл перечитывается не чаще раза в `check_interval` секунд
+    (по inode/mtime), снимок старше SNAPSHOT_MAX_AGE не отдается — вьюхи идут в БД.
+    """
+    pending_key = 'catalog_snapshot_pending'
+
+    def __init__(self, check_interval=1.0):
+        self.check_interval = check_interval
+        self.snapshot = None
+        self.signature = None
+        self.checked_at = 0
+        self.lock = threading.Lock()
+
+    def current(self):
+        if not getattr(settings, 'SNAPSHOT_ENABLED', True):
+            return None
+        if time.monotonic() - self.checked_at > self.check_interval:
+            self.reload()
+        snapshot = self.snapshot
+        if snapshot is None or time.time() - snapshot.built_at > getattr(settings, 'SNAPSHOT_MAX_AGE', 120):
+            return None
+        return snapshot
+
+    def reload(self):
+        with self.lock:
+            self.checked_at = time.monotonic()
+            try:
+                stat = os.stat(settings.SNAPSHOT_PATH)
+            except FileNotFoundError:
+                self.snapshot = self.signature = None
+                return
+            signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if signature != self.signature:
+                # старый mmap закроется сам, когда его перестанут использовать запросы в других потоках
+                self.snapshot = CatalogSnapshot(settings.SNAPSHOT_PATH)
+                self.signature = signature
+
+    def schedule_rebuild(self):
+        """ Called after catalog writes: one rebuild task per SNAPSHOT_REBUILD_DELAY window """
+        from apps.tasks.queue import enqueue
+
+        if not getattr(settings, 'SNAPSHOT_ENABLED', True):
+            return
+        delay = getattr(settings, 'SNAPSHOT_REBUILD_DELAY', 10)
+        if cache.add(self.pending_key, True, delay):
+            enqueue('django.core.management.call_command', 'build_snapshot',
+                    run_at=timezone.now() + timedelta(seconds=delay))
+
+
+snapshot_store = SnapshotStore()
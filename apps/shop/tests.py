@@ -1,3 +1,505 @@
-from django.test import TestCase
+import os
+import tempfile
+from io import StringIO
+from datetime import timedelta
+from contextlib import nullcontext
+from unittest import mock
 
-# Create your tests here.
+from django.conf             import settings
+from django.core.cache      import cache
+from django.core.management import call_command
+from django.db              import connection
+from django.test            import SimpleTestCase, TestCase, override_settings
+from django.utils           import timezone
+from rest_framework.test    import APIClient
+
+from apps.accounts.models   import User
+from apps.common.models     import ArchivedRecord, Checkpoint
+from apps.sellers.models    import Seller
+from apps.shop              import changes, recommendations, snapshot
+from apps.shop.autocomplete import AutocompleteIndex, make_keys
+from apps.shop.cart         import cart_store
+from apps.shop.counters     import view_counter
+from apps.shop.guest_cart   import guest_cart
+from apps.shop.filters      import ProductFilter
+from apps.shop.models       import Cart, Category, CoPurchase, Product, Review
+from apps.shop.serializers  import ProductSerializer
+from apps.shop.snapshot     import snapshot_store
+from apps.tasks.models      import Task
+from apps.profiles.models   import Order, OrderItem
+from apps.shop.views        import PRODUCT_ORDERINGS
+from apps.shop.management.commands.explain_orderings import SORT_MARKERS, CASES
+
+
+class CatalogTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('Buyer', 'One', 'buyer@example.com', 'password')
+        seller_user = User.objects.create_user('Seller', 'One', 'seller@example.com', 'password', account_type='SELLER')
+        cls.seller = Seller.objects.create(
+            user=seller_user, business_name='Shop One', inn_identification_number='1', phone_number='1',
+            business_description='d', business_address='a', city='c', postal_code='1', bank_name='b',
+            bank_bic_number='1', bank_account_number='1', bank_routing_number='1', is_approved=True,
+        )
+        cls.category = Category.objects.create(name='Phones', image='category.jpg')
+        cls.products = [
+            Product.objects.create(
+                seller=cls.seller, category=cls.category, name=f'Phone {i}', desc='desc',
+                price_current=10 + i, in_stock=i, image1='product.jpg',
+            )
+            for i in range(30)
+        ]
+
+    def setUp(self):
+        # авторизованный клиент: анонимные чтения могут идти из снимка каталога, а не из БД
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class ProductOrderingPlanTests(TestCase):
+    """ Every ?ordering= of ProductsView is read in index order, see `manage.py explain_orderings` """
+
+    def setUp(self):
+        if connection.vendor not in SORT_MARKERS:
+            self.skipTest(f"No plan check for {connection.vendor}")
+        if connection.vendor == 'postgresql':
+            # на пустой таблице планировщик выбрал бы seq scan + sort
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def test_orderings_use_indexes(self):
+        marker = SORT_MARKERS[connection.vendor]
+        for name, ordering in PRODUCT_ORDERINGS.items():
+            if name == 'trending':
+                continue
+            for label, params, range_column in CASES:
+                # диапазон по другой колонке планировщик вправе обслужить ее индексом + сортировкой
+                if range_column not in (None, ordering[0].lstrip('-')):
+                    continue
+                with self.subTest(ordering=name, filter=label):
+                    plan = ProductFilter(params, queryset=Product.objects.order_by(*ordering)).qs.explain()
+                    self.assertNotIn(marker, plan)
+
+
+class ProductRatingTests(CatalogTestCase):
+    def test_rating_is_read_from_column(self):
+        product = self.products[0]
+        Review.objects.create(user=self.user, product=product, rating=4, text='ok')
+        call_command('backfill_ratings', pause=0, stdout=StringIO())
+
+        with self.assertNumQueries(2):  # COUNT + page
+            response = self.client.get('/shop/products/?ordering=rating&page_size=30')
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(len(results), 30)
+        self.assertEqual((results[0]['slug'], results[0]['rating']), (product.slug, 4.0))
+        self.assertEqual(results[1]['rating'], 0)
+
+    def test_backfill(self):
+        reviewer = User.objects.create_user('Other', 'User', 'other@example.com', 'password')
+        Review.objects.bulk_create([
+            Review(user=self.user, product=self.products[1], rating=5, text='a'),
+            Review(user=reviewer, product=self.products[1], rating=2, text='b'),
+        ])
+        self.products[2].delete()
+        Review.objects.bulk_create([Review(user=self.user, product=self.products[2], rating=3, text='c')])
+
+        call_command('backfill_ratings', pause=0, batch_size=7, stdout=StringIO())
+        ratings = dict(Product.objects.unfiltered().values_list('slug', 'rating'))
+        self.assertEqual(ratings[self.products[1].slug], 3.5)
+        self.assertEqual(ratings[self.products[2].slug], 3.0)
+        self.assertEqual(ratings[self.products[0].slug], 0.0)
+
+
+class ReviewPaginationTests(CatalogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        users = User.objects.bulk_create([User(email=f'reviewer{i}@example.com') for i in range(25)])
+        cls.reviews = Review.objects.bulk_create([
+            Review(user=user, product=cls.products[0], rating=i % 3 + 3, text=f'review {i}') for i, user in enumerate(users)
+        ])
+        # одна метка времени у всех: порядок внутри нее держит только pk в курсоре
+        Review.objects.update(created_at=timezone.now())
+
+    def walk(self, url):
+        texts, pages = [], []
+        while url:
+            with self.assertNumQueries(2):  # product + page, no COUNT
+                data = self.client.get(url).json()
+            texts += [review['text'] for review in data['results']]
+            pages.append(data)
+            url = data['next']
+        return texts, pages
+
+    def test_pages_are_stable_with_equal_timestamps(self):
+        reviews = Review.objects.filter(product=self.products[0])
+        for ordering, keys in (('newest', ('-created_at', '-pk')), ('rating', ('-rating', '-created_at', '-pk'))):
+            with self.subTest(ordering=ordering):
+                texts, pages = self.walk(f'/shop/products/reviews/{self.products[0].slug}/?ordering={ordering}&page_size=4')
+                self.assertEqual(len(pages), 7)
+                self.assertEqual(texts, [review.text for review in reviews.order_by(*keys)])
+
+                # назад от последней страницы — те же страницы в том же порядке
+                back, url = [], pages[-1]['previous']
+                while url:
+                    data = self.client.get(url).json()
+                    back = [review['text'] for review in data['results']] + back
+                    url = data['previous']
+                self.assertEqual(back + [review['text'] for review in pages[-1]['results']], texts)
+
+
+class SnapshotParityTests(CatalogTestCase):
+    """ Anonymous reads served from the catalog snapshot match the ORM responses of the same endpoints """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Product.objects.filter(pk=cls.products[4].pk).update(price_old=99.5)
+        Review.objects.bulk_create([
+            Review(user=cls.user, product=cls.products[1], rating=5, text='a'),
+            Review(user=cls.user, product=cls.products[2], rating=2, text='b'),
+        ])
+        call_command('backfill_ratings', pause=0, stdout=StringIO())
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(SNAPSHOT_PATH=os.path.join(directory.name, 'catalog.snap'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(self.reset_store)
+        self.reset_store()
+        snapshot.build()
+        self.anonymous = APIClient()
+
+    def reset_store(self):
+        snapshot_store.snapshot = snapshot_store.signature = None
+        snapshot_store.checked_at = 0
+
+    def urls(self):
+        product, category, seller = self.products[4], self.category.slug, self.seller.slug
+        return [
+            '/shop/products/?page_size=50',
+            '/shop/products/?page_size=7&page=2&ordering=price',
+            '/shop/products/?ordering=-price&min_price=15&max_price=30&page_size=50',
+            '/shop/products/?ordering=rating&in_stock=10&fields=name,rating',
+            f'/shop/categories/{category}/?ordering=newest',
+            f'/shop/categories/{category}/?fields=slug,price_old',
+            f'/shop/sellers/{seller}/',
+            f'/shop/products/{product.slug}/',
+            f'/shop/products/{product.slug}/?fields=seller,category',
+        ]
+
+    def assert_same_as_orm(self, queries=None):
+        for url in self.urls():
+            with self.subTest(url=url):
+                expected = self.client.get(url)
+                if queries is None:
+                    response = self.anonymous.get(url)
+                else:
+                    with self.assertNumQueries(queries):
+                        response = self.anonymous.get(url)
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(response.json(), expected.json())
+
+    def test_snapshot_matches_orm(self):
+        self.assert_same_as_orm(queries=0)
+
+    def test_missing_or_stale_snapshot_falls_back_to_orm(self):
+        Product.objects.filter(pk=self.products[4].pk).update(price_current=55, name='Renamed')
+        with override_settings(SNAPSHOT_MAX_AGE=-1):
+            self.assert_same_as_orm()
+        os.remove(settings.SNAPSHOT_PATH)
+        self.reset_store()
+        self.assert_same_as_orm()
+
+    def test_catalog_write_schedules_rebuild(self):
+        product = self.products[4]
+        product.price_current = 55
+        product.save()
+        # в пределах SNAPSHOT_MAX_AGE отдается старый снимок, пока задача пересборки не выполнится
+        self.assertEqual(self.anonymous.get(f'/shop/products/{product.slug}/').json()['price_current'], '14.00')
+        self.assertEqual(list(Task.objects.values_list('name', 'args')), [('django.core.management.call_command', ['build_snapshot'])])
+
+        snapshot.build()
+        self.reset_store()
+        self.assert_same_as_orm(queries=0)
+
+
+class ProductBatchTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_cold_batch_is_one_query(self):
+        slugs = [product.slug for product in self.products] + [f'missing-{i}' for i in range(270)]
+        with self.assertNumQueries(1):  # slug__in, rating is a column
+            response = self.client.post('/shop/products/batch/', {'slugs': slugs}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 30)
+        self.assertEqual(len(response.json()['not_found']), 270)
+
+        with self.assertNumQueries(1):  # cached products, only the missing slugs are looked up
+            self.client.post('/shop/products/batch/', {'slugs': slugs}, format='json')
+        with self.assertNumQueries(0):
+            self.client.post('/shop/products/batch/', {'slugs': slugs[:30]}, format='json')
+
+
+class SparseFieldsTests(CatalogTestCase):
+    def test_only_selected_columns_are_read(self):
+        with self.assertNumQueries(2) as queries:  # COUNT + page
+            response = self.client.get('/shop/products/?fields=name,slug&page_size=5')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()['results'][0]), {'name', 'slug'})
+        page = queries.captured_queries[-1]['sql']
+        self.assertNotIn('JOIN', page)
+        self.assertNotIn('"desc"', page)
+        self.assertNotIn('"price_current"', page)
+
+    def test_relation_is_joined_only_when_selected(self):
+        with self.assertNumQueries(2) as queries:
+            response = self.client.get('/shop/products/?fields=name,category&page_size=5')
+        self.assertEqual(response.json()['results'][0]['category']['name'], 'Phones')
+        page = queries.captured_queries[-1]['sql']
+        self.assertIn('"shop_category"', page)
+        self.assertNotIn('"sellers_seller"', page)
+
+    def test_empty_selection_is_rejected(self):
+        for query in ['fields=,', 'exclude=' + ','.join(ProductSerializer.field_sources)]:
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f'/shop/products/?{query}').status_code, 400)
+
+
+class ViewCounterTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        view_counter.flush()
+
+    def test_sparse_views_are_counted_by_url_slug(self):
+        product = self.products[0]
+        for query in ['', '?fields=name', '?fields=price_current']:
+            self.assertEqual(self.client.get(f'/shop/products/{product.slug}/{query}').status_code, 200)
+        # не сервер: фоновый поток и atexit не запускались, сброс явный
+        self.assertIsNone(view_counter.pid)
+        self.assertEqual(view_counter.flush(), 1)
+        product.refresh_from_db()
+        self.assertEqual(product.views, 3)
+
+
+@override_settings(CATALOG_CHANGES_LAG=0)
+class CatalogChangesTests(CatalogTestCase):
+    def sync(self, cursor=None):
+        response = self.client.get('/shop/changes/', {'limit': 500, **({'cursor': cursor} if cursor else {})})
+        return response.status_code, response.json()
+
+    def test_unchanged_sync_is_one_probe(self):
+        status, data = self.sync()
+        self.assertEqual((status, len(data['products']), len(data['categories'])), (200, 30, 1))
+
+        with self.assertNumQueries(1):  # UNION ALL of both (updated_at, id) ranges, LIMIT 1
+            status, unchanged = self.sync(data['cursor'])
+        self.assertEqual((status, unchanged['products'], unchanged['categories']), (200, [], []))
+
+        self.products[3].delete()
+        status, changed = self.sync(unchanged['cursor'])
+        self.assertEqual([tombstone['slug'] for tombstone in changed['deleted_products']], [self.products[3].slug])
+        self.assertEqual(changed['products'], [])
+
+    def test_old_cursor_checks_archive(self):
+        old = timezone.now() - timedelta(days=40)
+        cursor = changes.encode_cursor({'categories': None, 'products': (old, self.products[0].id)}, old)
+        with self.assertNumQueries(4):  # archive, probe, categories, products
+            self.assertEqual(self.sync(cursor)[0], 200)
+
+        ArchivedRecord.objects.create(model='shop.Product', object_id='1', data={}, deleted_at=old + timedelta(days=1))
+        self.assertEqual(self.sync(cursor)[0], 410)
+
+
+class RecommendationsRefreshTests(CatalogTestCase):
+    def order(self, *products, minutes_ago=5):
+        order = Order.objects.create(user=self.user)
+        OrderItem.objects.bulk_create([OrderItem(user=self.user, order=order, product=product) for product in products])
+        Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(minutes=minutes_ago))
+
+    def scores(self):
+        return {(row.product_id, row.recommended_id): row.score for row in CoPurchase.objects.all()}
+
+    def test_incremental_refresh_adds_to_stored_scores(self):
+        a, b, c = self.products[:3]
+        self.order(a, b, minutes_ago=20)
+        self.order(a, b, c, minutes_ago=20)
+        self.assertEqual(recommendations.refresh(), (2, 3))
+        Checkpoint.objects.filter(name=recommendations.CHECKPOINT_NAME).update(position=timezone.now() - timedelta(minutes=10))
+        self.assertEqual(self.scores(), {
+            (a.pk, b.pk): 2, (b.pk, a.pk): 2, (a.pk, c.pk): 1, (c.pk, a.pk): 1, (b.pk, c.pk): 1, (c.pk, b.pk): 1,
+        })
+
+        self.order(a, c)
+        self.assertEqual(recommendations.refresh(), (1, 2))
+        self.assertEqual(self.scores()[a.pk, c.pk], 2)
+        self.assertEqual(self.scores()[a.pk, b.pk], 2)
+
+
+class CartTests(CatalogTestCase):
+    def test_post_is_one_write(self):
+        slug = self.products[0].slug
+        self.client.post('/shop/cart/', {'slug': slug, 'quantity': 1}, format='json')
+        with self.assertNumQueries(3):  # product, cart row, UPDATE ... WHERE version
+            response = self.client.post('/shop/cart/', {'slug': slug, 'quantity': 2}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(cart_store.get_lines(self.user), {self.products[0].pk: 2})
+        self.assertTrue(Cart.objects.get(user=self.user).dirty)
+        self.assertFalse(OrderItem.objects.filter(user=self.user).exists())
+
+    def test_concurrent_update_is_retried(self):
+        first, second = self.products[:2]
+        cart_store.set_quantity(self.user, first, 1)
+        load = cart_store.load
+
+        def racing_load(user):
+            # другой запрос успевает записать корзину между чтением и UPDATE
+            lines, version = load(user)
+            if second.pk not in lines:
+                cart_store.load = load
+                cart_store.set_quantity(user, first, 5)
+            return lines, version
+
+        cart_store.load = racing_load
+        try:
+            cart_store.set_quantity(self.user, second, 3)
+        finally:
+            cart_store.load = load
+        self.assertEqual(cart_store.get_lines(self.user), {first.pk: 5, second.pk: 3})
+
+
+class CoOccurrenceTests(SimpleTestCase):
+    rows = [(1, 'a'), (1, 'b'), (1, 'c'), (2, 'a'), (2, 'b'), (2, 'b'), (3, 'c'), (4, 'a'), (4, 'c'), (4, 'd')]
+    expected = {
+        'a': {'b': 2, 'c': 2, 'd': 1},
+        'b': {'a': 2, 'c': 1},
+        'c': {'a': 2, 'b': 1, 'd': 1},
+        'd': {'a': 1, 'c': 1},
+    }
+
+    def backends(self):
+        yield 'python', mock.patch.object(recommendations, 'sparse', None)
+        if recommendations.sparse is not None:
+            yield 'scipy', nullcontext()
+
+    def test_counts_each_pair_once_per_order(self):
+        for backend, context in self.backends():
+            with self.subTest(backend=backend), context:
+                self.assertEqual(recommendations.CoOccurrence(self.rows).top({}, 10), self.expected)
+                self.assertEqual(recommendations.CoOccurrence([]).top({}, 10), {})
+
+    def test_existing_scores_and_top_k(self):
+        existing = {('a', 'd'): 5, ('b', 'e'): 3}
+        for backend, context in self.backends():
+            with self.subTest(backend=backend), context:
+                top = recommendations.CoOccurrence(self.rows).top(existing, 1)
+                self.assertEqual((top['a'], top['b'], top['c']), ({'d': 6}, {'e': 3}, {'a': 2}))
+                self.assertEqual(len(top['d']), 1)
+
+    def test_backends_agree(self):
+        if recommendations.sparse is None:
+            self.skipTest("scipy is not installed")
+        rows = sorted((order, (order * 7 + i * 13) % 50) for order in range(300) for i in range(order % 9))
+        with mock.patch.object(recommendations, 'sparse', None):
+            expected = recommendations.CoOccurrence(rows).top({}, 50)
+        self.assertEqual(recommendations.CoOccurrence(rows).top({}, 50), expected)
+
+
+class GuestCartTests(CatalogTestCase):
+    def test_guest_cart_is_merged_on_login(self):
+        first, second, removed = self.products[:3]
+        cart_store.set_quantity(self.user, first, 2)
+
+        guest = APIClient()
+        for product, quantity in ((first, 1), (second, 3), (removed, 1)):
+            with self.assertNumQueries(1):  # product only, the cart is in the cookie
+                self.assertEqual(guest.post('/shop/cart/', {'slug': product.slug, 'quantity': quantity}, format='json').status_code, 201)
+        removed.delete()
+        self.assertFalse(OrderItem.objects.exists())
+
+        response = guest.post('/auth/token/', {'email': 'buyer@example.com', 'password': 'password'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.cookies[guest_cart.cookie_name].value, '')
+        self.assertEqual(cart_store.get_lines(self.user), {first.pk: 3, second.pk: 3})
+        self.assertEqual(guest.get('/shop/cart/').json(), [])
+
+    def test_flush_writes_only_dirty_carts(self):
+        other = User.objects.create(email='other@example.com')
+        first, second = self.products[:2]
+        cart_store.set_quantities(self.user, {first: 2, second: 1})
+        cart_store.set_quantity(other, first, 4)
+        cart_store.flush(other)
+        self.assertFalse(Cart.objects.get(user=other).dirty)
+
+        with self.assertNumQueries(7):  # dirty carts; per cart: lines, savepoint, OrderItem rows, insert, version check, release
+            self.assertEqual(cart_store.flush_dirty(), 1)
+        self.assertEqual(
+            dict(OrderItem.objects.filter(user=self.user, order=None).values_list('product_id', 'quantity')),
+            {first.pk: 2, second.pk: 1},
+        )
+        self.assertEqual(cart_store.flush_dirty(), 0)
+
+        cart_store.set_quantities(self.user, {first: 5, second: 0})
+        call_command('flush_carts', stdout=StringIO())
+        self.assertEqual(
+            dict(OrderItem.objects.filter(user=self.user, order=None).values_list('product_id', 'quantity')),
+            {first.pk: 5},
+        )
+        self.assertFalse(Cart.objects.filter(dirty=True).exists())
+
+    def test_change_during_flush_keeps_cart_dirty(self):
+        product = self.products[0]
+        cart_store.set_quantity(self.user, product, 1)
+        bulk_create = OrderItem.objects.bulk_create
+
+        def racing_bulk_create(*args, **kwargs):
+            cart_store.set_quantity(self.user, product, 2)  # запрос пользователя между чтением строк и записью
+            return bulk_create(*args, **kwargs)
+
+        with mock.patch.object(OrderItem.objects, 'bulk_create', racing_bulk_create):
+            cart_store.flush(self.user)
+        self.assertTrue(Cart.objects.get(user=self.user).dirty)
+        cart_store.flush(self.user)
+        self.assertEqual(OrderItem.objects.get(user=self.user).quantity, 2)
+
+
+class AutocompleteIndexTests(SimpleTestCase):
+    names = ['Apple iPhone 15', 'Apple Watch', 'Applied Science Kit', 'Ёлка новогодняя', 'Phone case', 'iPad Air',
+             'Pineapple slicer', 'Air fryer', 'Watch strap'] * 5
+
+    def setUp(self):
+        self.rows = [('product', i, name, f'slug-{i}', (i * 37) % 11) for i, name in enumerate(self.names)]
+        self.index = AutocompleteIndex()
+        self.index.bulk_load(self.rows)
+
+    def expected(self, query, rows, limit=10):
+        matches = [row for row in rows if any(key.startswith(query) for key in make_keys(row[2]))]
+        matches.sort(key=lambda row: (row[4], -row[1]), reverse=True)
+        return [row[3] for row in matches[:limit]]
+
+    def slugs(self, query, limit=10):
+        return [suggestion['slug'] for suggestion in self.index.search(query, limit)]
+
+    def test_matches_word_prefixes_by_popularity(self):
+        for query in ['a', 'ap', 'app', 'apple w', 'phone', 'air', 'ел', 'zzz', 'watch s']:
+            with self.subTest(query=query):
+                self.assertEqual(self.slugs(query), self.expected(query, self.rows))
+
+    def test_updates(self):
+        self.index.add('product', 100, 'Apple Pencil', 'pencil', 100)
+        self.index.add('product', 0, 'Banana', 'slug-0')                   # rename keeps the weight
+        self.index.add('product', 1, 'Apple Watch', 'slug-1', 50)          # same name, new weight
+        self.index.remove('product', 2)
+
+        self.assertEqual(self.slugs('ap', 2), ['pencil', 'slug-1'])
+        self.assertNotIn('slug-0', self.slugs('apple', 20))
+        self.assertEqual(self.slugs('ban'), ['slug-0'])
+        self.assertNotIn('slug-2', self.slugs('appl', 20))
+        self.assertEqual(self.slugs('penc'), ['pencil'])
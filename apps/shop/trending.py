@@ -0,0 +1,42 @@
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf                    import settings
+from django.db.models               import F, Value
+from django.db.models.functions     import Abs, Exp, Greatest, Ln
+from django.utils                   import timezone
+
+from apps.shop.models import Product
+
+
+# Затухающий счет: score = sum(weight * 2 ** (-(now - t) / half_life)).
+# Храним ln(sum(weight * e ** (λ * (t - EPOCH)))): старые события не нужно пересчитывать,
+# порядок по этому числу совпадает с порядком по затухающему счету в любой момент,
+# а добавление события — один UPDATE (logaddexp), т.е. O(log n) на обновление индекса.
+
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+CHECKOUT_WEIGHT = 1.0   # per unit bought
+REVIEW_WEIGHT = 0.5     # per star
+
+
+def event_value(weight, at=None):
+    half_life = getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 72) * 3600
+    at = at or timezone.now()
+    return math.log(weight) + math.log(2) * (at - EPOCH).total_seconds() / half_life
+
+
+def record(product_id, weight, at=None):
+    value = Value(event_value(weight, at))
+    Product.objects.unfiltered().filter(pk=product_id).update(
+        trending_score=Greatest(F('trending_score'), value) + Ln(1 + Exp(-Abs(F('trending_score') - value))),
+    )
+
+
+def record_checkout(orderitems):
+    for product_id, quantity in orderitems.values_list('product_id', 'quantity'):
+        record(product_id, CHECKOUT_WEIGHT * max(quantity, 1))
+
+
+def record_review(product_id, rating):
+    record(product_id, REVIEW_WEIGHT * rating)
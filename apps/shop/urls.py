@@ -1,7 +1,9 @@
 from django.urls import path
 
 from apps.shop.views import CategoriesView, ProductsByCategoryView, ProductsBySellerView, ProductsView, ProductView, \
-                                CartView, CheckoutView, OrderView, OrderItemView, ReviewsView, CreateReviewView
+                                CartView, CheckoutView, OrderView, OrderItemView, ReviewsView, CreateReviewView, \
+                                ProductBatchView, ProductRecommendationsView, CatalogChangesView, \
+                                AutocompleteView
 
 
 urlpatterns = [
@@ -13,7 +15,11 @@ urlpatterns = [
     path("products/reviews/<slug:slug>/", ReviewsView.as_view()),
     path("products/reviews/", CreateReviewView.as_view()),
 
+    path("products/batch/", ProductBatchView.as_view()),
     path("products/<slug:slug>/", ProductView.as_view()),
+    path("products/<slug:slug>/also-bought/", ProductRecommendationsView.as_view()),
+    path("changes/", CatalogChangesView.as_view()),
+    path("autocomplete/", AutocompleteView.as_view()),
     path("cart/", CartView.as_view()),
     path("checkout/", CheckoutView.as_view()),
     path("orders/", OrderView.as_view()),
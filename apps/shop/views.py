@@ -1,17 +1,35 @@
+from django.conf                import settings
+from django.db                  import IntegrityError, transaction
+from django.db.models           import Count, Max, Min, Q
+from django.utils               import timezone
 from rest_framework.views       import APIView
 from rest_framework.response    import Response
+from rest_framework.exceptions  import ValidationError
 from drf_spectacular.utils      import extend_schema
 from rest_framework.pagination  import PageNumberPagination
 
 from apps.shop.serializers  import CategorySerializer, ProductSerializer, OrderItemSerializer, ToggleCartItemSerializer, \
-                                    CheckoutSerializer, OrderSerializer, CheckItemOrderSerializer, ReviewSerializer, CreateReviewSerializer
-from apps.shop.models       import Category, Product, Review
+                                    CheckoutSerializer, OrderSerializer, CheckItemOrderSerializer, ReviewSerializer, CreateReviewSerializer, \
+                                    ProductBatchSerializer, CategoryStatsSerializer, CategoryChangeSerializer, ProductChangeSerializer, \
+                                    TombstoneSerializer, CatalogChangesSerializer, SuggestionSerializer
+from apps.shop.models       import Category, Product, Review, CoPurchase
 from apps.sellers.models    import Seller
 from apps.profiles.models   import ShippingAddress, Order, OrderItem
-from apps.common.pagination import CustomPagination
-from apps.common.utils      import set_dict_attr
+from apps.common.pagination import CustomPagination, CustomCursorPagination
+from apps.common.throttling import ScopedTokenBucketThrottle
+from apps.common.idempotency import idempotent
+from apps.common.compression import cache_compressed
 from apps.shop.filters      import ProductFilter
-from apps.shop.schema_examples import PRODUCT_PARAM_EXAMPLE
+from apps.shop.cart         import cart_store
+from apps.shop.guest_cart   import guest_cart
+from apps.shop.cache        import product_cache, category_cache
+from apps.shop              import trending, ratings, changes
+from apps.shop.counters     import view_counter
+from apps.shop.snapshot     import snapshot_store
+from apps.shop.autocomplete import autocomplete
+from apps.shop.schema_examples import PRODUCT_PARAM_EXAMPLE, PRODUCT_FIELDS_PARAM_EXAMPLE, PRODUCT_ORDERING_PARAM_EXAMPLE, \
+                                        REVIEW_PARAM_EXAMPLE, CHANGES_PARAM_EXAMPLE, IDEMPOTENCY_PARAM_EXAMPLE, \
+                                        AUTOCOMPLETE_PARAM_EXAMPLE
 
 
 tags = ['Shop']
@@ -19,16 +37,29 @@ tags = ['Shop']
 
 class CategoriesView(APIView):
     serializer_class = CategorySerializer
+    throttle_classes = [ScopedTokenBucketThrottle]
+    throttle_scope = 'catalog'
 
     @extend_schema(
         summary="Categories Fetch",
-        description="This endpoint returns all categories",
-        tags=tags
+        description="This endpoint returns all categories with product count, in-stock count and price range",
+        tags=tags,
+        responses=CategoryStatsSerializer(many=True),
     )
     def get(self, request, *args, **kwargs):
-        categories = Category.objects.all()
-        serializer = self.serializer_class(categories, many=True)
-        return Response(data=serializer.data, status=200)
+        data = category_cache.get()
+        if data is None:
+            # один GROUP BY по живым товарам; кэш сбрасывается сигналами на запись Product/Category
+            live = Q(products__is_deleted=False)
+            categories = Category.objects.annotate(
+                product_count=Count('products', filter=live),
+                in_stock_count=Count('products', filter=live & Q(products__in_stock__gt=0)),
+                min_price=Min('products__price_current', filter=live),
+                max_price=Max('products__price_current', filter=live),
+            ).order_by('name')
+            data = list(CategoryStatsSerializer(categories, many=True).data)
+            category_cache.set(data)
+        return cache_compressed(Response(data=data, status=200), category_cache.key, settings.CATEGORY_CACHE_TIMEOUT)
 
     @extend_schema(
         summary="Category Create",
@@ -46,27 +77,68 @@ class CategoriesView(APIView):
             return Response(serializer.errors, status=400)
 
 
+# у каждого варианта (кроме trending) есть составной индекс с is_deleted, см. Product.Meta
+# и `manage.py explain_orderings`
+PRODUCT_ORDERINGS = {
+    'trending': ('-trending_score', '-created_at'),
+    'price': ('price_current', 'id'),
+    '-price': ('-price_current', '-id'),
+    'newest': ('-created_at', '-id'),
+    'rating': ('-rating', '-id'),
+}
+
+
+def get_product_ordering(request):
+    ordering = request.query_params.get('ordering')
+    if ordering and ordering not in PRODUCT_ORDERINGS:
+        raise ValidationError({'ordering': f"Available: {', '.join(PRODUCT_ORDERINGS)}"})
+    return PRODUCT_ORDERINGS.get(ordering)
+
+
+def get_catalog_snapshot(request):
+    """ mmap'd catalog snapshot for anonymous reads, None if disabled, missing or stale (then the DB is used) """
+    if request.user and request.user.is_authenticated:
+        return None
+    return snapshot_store.current()
+
+
 class ProductsByCategoryView(APIView):
     serializer_class = ProductSerializer
+    throttle_classes = [ScopedTokenBucketThrottle]
+    throttle_scope = 'catalog'
 
     @extend_schema(
         operation_id="category_products",
         summary="Category Products Fetch",
         description="This endpoint returns all products in a particular category",
         tags=tags,
+        parameters=[*PRODUCT_ORDERING_PARAM_EXAMPLE, *PRODUCT_FIELDS_PARAM_EXAMPLE],
     )
     def get(self, request, *args, **kwargs):
+        fields = self.serializer_class.get_sparse_fields(request.query_params)
+        ordering = get_product_ordering(request)
+        snapshot = get_catalog_snapshot(request)
+        if snapshot and kwargs["slug"] in snapshot.categories:
+            rows = snapshot.product_rows(category=snapshot.categories[kwargs["slug"]],
+                                         ordering=request.query_params.get('ordering'))
+            return Response(data=[snapshot.product(row, fields) for row in rows], status=200)
+
         category = Category.objects.get_or_none(slug=kwargs["slug"])
         if not category:
             return Response(data={"message": "Category does not exist!"}, status=404)
 
         products = Product.objects.select_related("category", "seller", "seller__user").filter(category=category)
-        serializer = self.serializer_class(products, many=True)
+        if ordering:
+            products = products.order_by(*ordering)
+        products = self.serializer_class.sparse_queryset(products, fields)
+        serializer = self.serializer_class(products, many=True, fields=fields)
         return Response(data=serializer.data, status=200)
 
 
 class ProductsView(APIView):
     serializer_class = ProductSerializer
+    throttle_classes = [ScopedTokenBucketThrottle]
+    throttle_scope = 'catalog'
     pagination_class = CustomPagination
 
     @extend_schema(
@@ -77,13 +149,28 @@ class ProductsView(APIView):
         parameters=PRODUCT_PARAM_EXAMPLE,
     )
     def get(self, request, *args, **kwargs):
+        fields = self.serializer_class.get_sparse_fields(request.query_params)
+        ordering = get_product_ordering(request)
+        snapshot = get_catalog_snapshot(request)
+        if snapshot:
+            # форма фильтра валидируется без запросов, невалидные параметры отдает ORM-путь ниже
+            filterset = ProductFilter(request.query_params, queryset=Product.objects.none())
+            if filterset.is_valid():
+                rows = snapshot.product_rows(filters=filterset.form.cleaned_data,
+                                             ordering=request.query_params.get('ordering'))
+                paginator = self.pagination_class()
+                page = paginator.paginate_queryset(rows, request)
+                return paginator.get_paginated_response(data=[snapshot.product(row, fields) for row in page])
+
         products = Product.objects.select_related("category", "seller", "seller__user").all()
+        if ordering:
+            products = products.order_by(*ordering)
         filterset = ProductFilter(request.query_params, queryset=products)
         if filterset.is_valid():
-            queryset = filterset.qs
+            queryset = self.serializer_class.sparse_queryset(filterset.qs, fields)
             paginator = self.pagination_class()
             paginated_queryset = paginator.paginate_queryset(queryset, request)
-            serializer = self.serializer_class(paginated_queryset, many=True)
+            serializer = self.serializer_class(paginated_queryset, many=True, fields=fields)
             return paginator.get_paginated_response(data=serializer.data)
         else:
             return Response(data=filterset.errors, status=400)
@@ -91,27 +178,40 @@ class ProductsView(APIView):
 
 class ProductsBySellerView(APIView):
     serializer_class = ProductSerializer
+    throttle_classes = [ScopedTokenBucketThrottle]
+    throttle_scope = 'catalog'
 
     @extend_schema(
         summary="Seller Products Fetch",
         description="This endpoint returns all products in a particular seller",
         tags=tags,
+        parameters=PRODUCT_FIELDS_PARAM_EXAMPLE,
     )
     def get(self, request, *args, **kwargs):
+        fields = self.serializer_class.get_sparse_fields(request.query_params)
+        snapshot = get_catalog_snapshot(request)
+        if snapshot and kwargs["slug"] in snapshot.sellers:
+            rows = snapshot.product_rows(seller=snapshot.sellers[kwargs["slug"]])
+            return Response(data=[snapshot.product(row, fields) for row in rows], status=200)
+
         seller = Seller.objects.get_or_none(slug=kwargs["slug"])
         if not seller:
             return Response(data={"message": "Seller does not exist!"}, status=404)
 
         products = Product.objects.select_related("category", "seller", "seller__user").filter(seller=seller)
-        serializer = self.serializer_class(products, many=True)
+        products = self.serializer_class.sparse_queryset(products, fields)
+        serializer = self.serializer_class(products, many=True, fields=fields)
         return Response(data=serializer.data, status=200)
 
 
 class ProductView(APIView):
     serializer_class = ProductSerializer
+    throttle_classes = [ScopedTokenBucketThrottle]
+    throttle_scope = 'catalog'
 
-    def get_object(self, slug):
-        product = Product.objects.get_or_none(slug=slug)
+    def get_object(self, slug, fields=None):
+        products = Product.objects.select_related("category", "seller", "seller__user")
+        product = self.serializer_class.sparse_queryset(products, fields).get_or_none(slug=slug)
         return product
 
     @extend_schema(
@@ -119,16 +219,173 @@ class ProductView(APIView):
         summary="Product Details Fetch",
         description="This endpoint returns the details for a product via the slug",
         tags=tags,
+        parameters=PRODUCT_FIELDS_PARAM_EXAMPLE,
     )
     def get(self, request, *args, **kwargs):
-        product = self.get_object(kwargs['slug'])
+        fields = self.serializer_class.get_sparse_fields(request.query_params)
+        snapshot = get_catalog_snapshot(request)
+        # полная карточка из снимка и из кэша совпадает побайтно — сжатые байты у них общие
+        cache_key = product_cache.key_format % kwargs['slug'] if fields is None else None
+        row = snapshot.find(kwargs['slug']) if snapshot else None
+        if row is not None:
+            view_counter.increment(kwargs['slug'])
+            response = Response(data=snapshot.product(row, fields), status=200)
+            return cache_compressed(response, cache_key, product_cache.timeout) if cache_key else response
+
+        if fields is None:
+            data = product_cache.get(kwargs['slug'])
+            if data is not None:
+                view_counter.increment(kwargs['slug'])
+                return cache_compressed(Response(data=data, status=200), cache_key, product_cache.timeout)
+
+        product = self.get_object(kwargs['slug'], fields)
         if not product:
             return Response(data={"message": "Product does not exist!"}, status=404)
 
-        serializer = self.serializer_class(product)
+        view_counter.increment(kwargs['slug'])  # product.slug может быть отложен через ?fields=
+
+        serializer = self.serializer_class(product, fields=fields)
+        response = Response(data=serializer.data, status=200)
+        if fields is None:
+            product_cache.set_many({product.slug: serializer.data})
+            cache_compressed(response, cache_key, product_cache.timeout)
+        return response
+
+
+class ProductRecommendationsView(APIView):
+    serializer_class = ProductSerializer
+    throttle_classes = [ScopedTokenBucketThrottle]
+    throttle_scope = 'catalog'
+    recommended_fields = ['name', 'slug', 'price_current', 'image1']
+
+    @extend_schema(
+        operation_id="product_also_bought",
+        summary="Customers Also Bought",
+        description="This endpoint returns products most often bought together with the product",
+        tags=tags,
+    )
+    def get(self, request, *args, **kwargs):
+        # одна выборка по индексу (product, -score), таблица пересчитывается `manage.py refresh_recommendations`
+        products = [
+            row.recommended for row in
+            CoPurchase.objects.filter(product__slug=kwargs['slug'], recommended__is_deleted=False)
+            .select_related('recommended')
+            .only(*(f'recommended__{name}' for name in self.recommended_fields))
+            .order_by('-score')[:settings.RECOMMENDATIONS_TOP_K]
+        ]
+        serializer = self.serializer_class(products, many=True, fields=self.recommended_fields)
         return Response(data=serializer.data, status=200)
 
 
+class ProductBatchView(APIView):
+    serializer_class = ProductSerializer
+    throttle_classes = [ScopedTokenBucketThrottle]
+    throttle_scope = 'catalog'
+
+    @extend_schema(
+        operation_id="product_batch",
+        summary="Products Batch Fetch",
+        description="This endpoint returns up to 300 products by slug in one request, keyed by slug",
+        tags=tags,
+        request=ProductBatchSerializer,
+        parameters=PRODUCT_FIELDS_PARAM_EXAMPLE,
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = ProductBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        slugs = list(dict.fromkeys(serializer.validated_data['slugs']))
+        fields = self.serializer_class.get_sparse_fields(request.query_params)
+
+        results = product_cache.get_many(slugs)
+        missing = [slug for slug in slugs if slug not in results]
+        if missing:
+            # один запрос на все промахи: связи через select_related, рейтинг — колонка Product.rating
+            products = Product.objects.select_related("category", "seller", "seller__user").filter(slug__in=missing)
+            fetched = {product.slug: self.serializer_class(product).data for product in products}
+            product_cache.set_many(fetched)
+            results.update(fetched)
+
+        if fields is not None:
+            results = {slug: {name: data[name] for name in fields} for slug, data in results.items()}
+        not_found = [slug for slug in slugs if slug not in results]
+        return Response(data={'results': results, 'not_found': not_found}, status=200)
+
+
+class AutocompleteView(APIView):
+    throttle_classes = [ScopedTokenBucketThrottle]
+    throttle_scope = 'catalog'
+
+    @extend_schema(
+        operation_id="autocomplete",
+        summary="Search Suggestions Fetch",
+        description="This endpoint returns products, categories and sellers whose name has a word starting with q, "
+                    "most popular first. Served from an in-memory index, no database queries",
+        tags=tags,
+        parameters=AUTOCOMPLETE_PARAM_EXAMPLE,
+        responses=SuggestionSerializer(many=True),
+    )
+    def get(self, request, *args, **kwargs):
+        try:
+            limit = max(int(request.query_params.get('limit', 10)), 1)
+        except ValueError:
+            raise ValidationError({'limit': "A valid integer is required."})
+        return Response(data=autocomplete.search(request.query_params.get('q', ''), limit), status=200)
+
+
+class CatalogChangesView(APIView):
+    throttle_classes = [ScopedTokenBucketThrottle]
+    throttle_scope = 'catalog'
+    max_limit = 500
+
+    @extend_schema(
+        operation_id="catalog_changes",
+        summary="Catalog Changes Fetch",
+        description="This endpoint returns categories and products changed since the cursor, "
+                    "soft-deleted products come as tombstones. Repeat with the returned cursor while has_more is true. "
+                    "410 means a product deleted after the cursor position was already archived and the client "
+                    "must resync from scratch",
+        tags=tags,
+        parameters=CHANGES_PARAM_EXAMPLE,
+        responses=CatalogChangesSerializer,
+    )
+    def get(self, request, *args, **kwargs):
+        try:
+            limit = min(max(int(request.query_params.get('limit', 100)), 1), self.max_limit)
+        except ValueError:
+            raise ValidationError({'limit': "A valid integer is required."})
+        cursor = request.query_params.get('cursor')
+        try:
+            positions, since = changes.decode_cursor(cursor, ('categories', 'products'))
+        except changes.InvalidCursor:
+            raise ValidationError({'cursor': "Invalid cursor."})
+        if cursor and changes.is_expired(positions, since):
+            return Response({'message': "Cursor has expired, resync from scratch"}, status=410)
+
+        until = changes.until()
+        streams = [(Category.objects.all(), positions['categories']), (Product.objects.unfiltered(), positions['products'])]
+        if cursor and not changes.has_changes(streams, until):
+            categories, categories_more, products, products_more = [], False, [], False
+        else:
+            categories, categories_more = changes.fetch(Category.objects.all(), positions['categories'], limit, until)
+            products, products_more = changes.fetch(
+                Product.objects.unfiltered().select_related("category", "seller", "seller__user"),
+                positions['products'], limit, until,
+            )
+        if categories:
+            positions['categories'] = (categories[-1].updated_at, categories[-1].id)
+        if products:
+            positions['products'] = (products[-1].updated_at, products[-1].id)
+
+        data = {
+            'categories': CategoryChangeSerializer(categories, many=True).data,
+            'products': ProductChangeSerializer([product for product in products if not product.is_deleted], many=True).data,
+            'deleted_products': TombstoneSerializer([product for product in products if product.is_deleted], many=True).data,
+            'cursor': changes.encode_cursor(positions, since),
+            'has_more': categories_more or products_more,
+        }
+        return Response(data=data, status=200)
+
+
 class CartView(APIView):
     serializer_class = OrderItemSerializer
 
@@ -139,9 +396,10 @@ class CartView(APIView):
     )
     def get(self, request, *args, **kwargs):
         user = request.user
-        orderitems = OrderItem.objects.filter(user=user, order=None).select_related(
-            "product", "product__seller", "product__seller__user"
-        )
+        if not user.is_authenticated:
+            orderitems = guest_cart.items(guest_cart.load(request))
+        else:
+            orderitems = cart_store.items(user)
         serializer = self.serializer_class(orderitems, many=True)
         return Response(data=serializer.data)
 
@@ -150,12 +408,18 @@ class CartView(APIView):
         description="""
             This endpoint allows a user or guest to add/update/remove an item in cart
             If quantity is 0, the item is removed from cart
+            A list of items can be sent to change several items at once, the full cart is returned
         """,
         tags=tags,
         request=ToggleCartItemSerializer,
+        parameters=IDEMPOTENCY_PARAM_EXAMPLE,
     )
+    @idempotent
     def post(self, request, *args, **kwargs):
         user = request.user
+        if isinstance(request.data, list):
+            return self.post_many(request)
+
         serializer = ToggleCartItemSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
@@ -165,12 +429,16 @@ class CartView(APIView):
         if not product:
             return Response({'message': 'No Product with that slug'}, status=404)
 
-        orderitem, created = OrderItem.objects.update_or_create(
-            user=user,
-            order_id=None,
-            product=product,
-            defaults={'quantity': quantity},
-        )
+        if not user.is_authenticated:
+            lines = guest_cart.load(request)
+            if data['slug'] not in lines and quantity and len(lines) >= guest_cart.max_items:
+                return Response({'message': f'Guest cart is limited to {guest_cart.max_items} items'}, status=400)
+            created = data['slug'] in guest_cart.set_quantities(lines, {data['slug']: quantity})
+            orderitem = OrderItem(product=product, quantity=quantity)
+        else:
+            lines = None
+            created = cart_store.set_quantity(user, product, quantity)
+            orderitem = OrderItem(user=user, product=product, quantity=quantity)
 
         resp_message_substring  = 'Updated In'
         status_code = 200
@@ -179,25 +447,66 @@ class CartView(APIView):
             resp_message_substring = "Added To"
         if orderitem.quantity == 0:
             resp_message_substring  = 'Removed From'
-            orderitem.delete()
             data = None
         if resp_message_substring  != 'Removed From':
             serializer = self.serializer_class(orderitem)
             data = serializer.data
-        return Response(data={'message': f'Item {resp_message_substring } Cart', 'item': data}, status=status_code)
+        response = Response(data={'message': f'Item {resp_message_substring } Cart', 'item': data}, status=status_code)
+        if lines is not None:
+            guest_cart.save(response, lines)
+        return response
+
+    def post_many(self, request):
+        user = request.user
+        serializer = ToggleCartItemSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        quantities = {item['slug']: item['quantity'] for item in serializer.validated_data}
+
+        if not user.is_authenticated:
+            return self.post_many_guest(request, quantities)
+
+        products = Product.objects.filter(slug__in=quantities.keys())
+        if len(products) != len(quantities):
+            found = {product.slug for product in products}
+            not_found = [slug for slug in quantities if slug not in found]
+            return Response({'message': 'No Product with that slug', 'not_found': not_found}, status=404)
+
+        cart_store.set_quantities(user, {product: quantities[product.slug] for product in products})
+        serializer = self.serializer_class(cart_store.items(user), many=True)
+        return Response(data={'message': 'Cart Updated', 'items': serializer.data}, status=200)
+
+    def post_many_guest(self, request, quantities):
+        lines = guest_cart.load(request)
+        # один запрос проверяет и новые позиции, и уже лежащие в cookie
+        products = guest_cart.products(set(lines) | set(quantities))
+        not_found = [slug for slug in quantities if slug not in products]
+        if not_found:
+            return Response({'message': 'No Product with that slug', 'not_found': not_found}, status=404)
+
+        guest_cart.set_quantities(lines, quantities)
+        if len(lines) > guest_cart.max_items:
+            return Response({'message': f'Guest cart is limited to {guest_cart.max_items} items'}, status=400)
+        serializer = self.serializer_class(guest_cart.items(lines, products), many=True)
+        response = Response(data={'message': 'Cart Updated', 'items': serializer.data}, status=200)
+        guest_cart.save(response, lines)
+        return response
         
 
 class CheckoutView(APIView):
     serializer_class = CheckoutSerializer
+    throttle_scope = 'checkout'
 
     @extend_schema(
         summary='Checkout',
         description="This endpoint allows a user to create an order through which payment can then be made through",
         tags=tags,
         request=CheckoutSerializer,
+        parameters=IDEMPOTENCY_PARAM_EXAMPLE,
     )
+    @idempotent
     def post(self, request, *args, **kwargs):
         user = request.user
+        cart_store.flush(user)
         orderitems = OrderItem.objects.filter(user=user, order=None)
         if not orderitems.exists():
             return Response({'message': 'No Items in Cart'}, status=404)
@@ -230,6 +539,8 @@ class CheckoutView(APIView):
 
         order = Order.objects.create(user=user, **data)
         orderitems.update(order=order)
+        cart_store.clear(user)
+        trending.record_checkout(order.orderitems.all())
 
         serializer = OrderSerializer(order)
         return Response(data={"message": "Checkout Successful", "item": serializer.data}, status=200)
@@ -275,11 +586,21 @@ class OrderItemView(APIView):
 
 class ReviewsView(APIView):
     serializer_class = ReviewSerializer
+    pagination_class = CustomCursorPagination
+    throttle_classes = [ScopedTokenBucketThrottle]
+    throttle_scope = 'catalog'
+    # served by (product, is_deleted, created_at, id) and (product, is_deleted, rating, created_at, id) indexes,
+    # ?rating=N with the default ordering too; the keyset cursor includes every key plus pk
+    orderings = {
+        'newest': ('-created_at',),
+        'rating': ('-rating', '-created_at'),
+    }
 
     @extend_schema(
         summary='Reviews Fetch',
-        description="This endpoint returns all product's reviews",
+        description="This endpoint returns product's reviews page by page",
         tags=tags,
+        parameters=REVIEW_PARAM_EXAMPLE,
     )
     def get(self, request, **kwargs):
         product_slug = kwargs.get('slug')
@@ -287,20 +608,32 @@ class ReviewsView(APIView):
         if not product:
             return Response({'message': 'Product with this slug does not exist!'}, status=404)
 
-        reviews = product.reviews.all()
-        serializer = self.serializer_class(reviews, many=True)
-        return Response(data=serializer.data)
+        reviews = Review.objects.filter(product=product).select_related('user').only(
+            'user__email', 'product_id', 'rating', 'text', 'created_at',
+        )
+        rating = request.query_params.get('rating')
+        if rating:
+            if not rating.isdigit():
+                return Response({'message': 'Rating must be a number'}, status=400)
+            reviews = reviews.filter(rating=rating)
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(reviews, request, view=self)
+        for review in page:
+            review.product = product
+        serializer = self.serializer_class(page, many=True)
+        return paginator.get_paginated_response(data=serializer.data)
 
     def delete(self, request, **kwargs):
         product_slug = kwargs.get('slug')
-        product = Product.objects.get_or_none(slug=product_slug)
-        if not product:
-            return Response({'message': 'Product with this slug does not exist!'}, status=404)
-
-        if not product.reviews.filter(user=request.user).exists():
+        # soft delete одним UPDATE; лишний запрос — только чтобы различить ошибки
+        deleted = Review.objects.filter(user=request.user, product__slug=product_slug).delete()
+        product_cache.invalidate(product_slug)
+        if not deleted:
+            if not Product.objects.filter(slug=product_slug).exists():
+                return Response({'message': 'Product with this slug does not exist!'}, status=404)
             return Response({'message': 'You did not reviewed this product!'}, status=400)
-
-        Review.objects.get(product=product, user=request.user).delete()
+        ratings.refresh(Product.objects.filter(slug=product_slug))
         return Response(data={'message': 'Review deleted successfully'}, status=204)
 
 
@@ -314,39 +647,42 @@ class CreateReviewView(APIView):
         request=CreateReviewSerializer,
     )
     def post(self, request, *args, **kwargs):
-        data = request.data
-        product_slug = data.get('product_slug')
-        product = Product.objects.get_or_none(slug=product_slug)
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=400)
+        data = serializer.validated_data
+        product_slug = data.pop('product_slug')
+
+        product = Product.objects.only('id', 'slug').get_or_none(slug=product_slug)
         if not product:
             return Response({'message': 'Product with this slug does not exist!'}, status=404)
 
-        if product.reviews.filter(user=request.user).exists():
+        # повторный отзыв отсекает unique_active_review, без предварительного exists()
+        try:
+            with transaction.atomic():
+                review = Review.objects.create(user=request.user, product=product, **data)
+        except IntegrityError:
             return Response({'message': 'You have already reviewed this product!'}, status=400)
-
-        serializer = self.serializer_class(data=data)
-        if serializer.is_valid():
-            serializer.validated_data.pop('product_slug')
-            review = Review.objects.create(user=request.user, product=product, **serializer.validated_data)
-            serializer = ReviewSerializer(review)
-            return Response(data=serializer.data, status=201)
-        return Response(serializer.errors, status=400)
+        ratings.refresh(Product.objects.filter(pk=product.pk))
+        product_cache.invalidate(product_slug)
+        trending.record_review(product.id, review.rating)
+        serializer = ReviewSerializer(review)
+        return Response(data=serializer.data, status=201)
 
     def put(self, request, *args, **kwargs):
-        data = request.data
-        product_slug = data.get('product_slug')
-        product = Product.objects.get_or_none(slug=product_slug)
-        if not product:
-            return Response({'message': 'Product with this slug does not exist!'}, status=404)
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=400)
+        data = serializer.validated_data
+        product_slug = data.pop('product_slug')
 
-        if not product.reviews.filter(user=request.user).exists():
+        updated = Review.objects.filter(user=request.user, product__slug=product_slug).update(
+            updated_at=timezone.now(), **data,
+        )
+        product_cache.invalidate(product_slug)
+        if not updated:
+            if not Product.objects.filter(slug=product_slug).exists():
+                return Response({'message': 'Product with this slug does not exist!'}, status=404)
             return Response({'message': 'You did not reviewed this product!'}, status=400)
-
-        serializer = self.serializer_class(data=data)
-        if serializer.is_valid():
-            data = serializer.validated_data
-            review = Review.objects.get(user=request.user, product=product)
-            review = set_dict_attr(review, data)
-            review.save()
-            return Response({'message': 'Your review successfully updated!'}, status=200)
-
-        return Response(serializer.errors, status=400)
+        ratings.refresh(Product.objects.filter(slug=product_slug))
+        return Response({'message': 'Your review successfully updated!'}, status=200)
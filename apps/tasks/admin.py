@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from apps.tasks.models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'run_at', 'attempts', 'max_attempts', 'locked_by', 'finished_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'last_error')
+    readonly_fields = ('started_at', 'finished_at', 'locked_by', 'last_error', 'created_at', 'updated_at')
+    ordering = ('-run_at',)
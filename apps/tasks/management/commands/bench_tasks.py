@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.tasks.models  import Task
+from apps.tasks.queue   import enqueue
+from apps.tasks.worker  import Worker
+
+
+def noop(n):
+    return n
+
+
+def sleep(seconds):
+    time.sleep(seconds)
+
+
+class Command(BaseCommand):
+    help = "Measures task queue throughput (enqueue and processing) on the configured database"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread')
+        parser.add_argument('--sleep', type=float, default=0,
+                            help="Seconds each task sleeps to simulate IO-bound work (0 = no-op tasks)")
+
+    def handle(self, *args, **options):
+        name = __name__ + ('.sleep' if options['sleep'] else '.noop')
+        arg = options['sleep'] or 1
+
+        started = time.perf_counter()
+        tasks = [enqueue(name, arg) for _ in range(options['tasks'])]
+        enqueue_time = time.perf_counter() - started
+
+        worker = Worker(concurrency=options['concurrency'], pool=options['pool'], poll_interval=0.01, names=[name])
+        started = time.perf_counter()
+        worker.run(burst=True)
+        run_time = time.perf_counter() - started
+
+        Task.objects.filter(id__in=[task.id for task in tasks]).delete()
+        self.stdout.write(f"enqueue: {len(tasks) / enqueue_time:8.0f} tasks/s")
+        self.stdout.write(
+            f"process: {worker.processed / run_time:8.0f} tasks/s "
+            f"({options['pool']} x {options['concurrency']}, failed: {worker.failed})"
+        )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from apps.tasks.worker import Worker
+
+
+class Command(BaseCommand):
+    help = "Runs background tasks from the Task table in a thread or process pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread')
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help="Seconds after which a RUNNING task is considered abandoned and requeued")
+        parser.add_argument('--burst', action='store_true', help="Exit when the queue is empty")
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            concurrency=options['concurrency'],
+            pool=options['pool'],
+            poll_interval=options['poll_interval'],
+            stale_after=options['stale_after'],
+            log=self.stderr.write,
+        )
+        self.stdout.write(f"Worker {worker.worker_id} started ({options['pool']} x {options['concurrency']})")
+        try:
+            worker.run(burst=options['burst'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(f"Processed: {worker.processed}, failed: {worker.failed}")
@@ -0,0 +1,36 @@
+from django.db      import models
+from django.utils   import timezone
+
+from apps.common.models import BaseModel
+
+
+TASK_STATUS_CHOICES = (
+    ('PENDING', 'PENDING'),
+    ('RUNNING', 'RUNNING'),
+    ('SUCCESS', 'SUCCESS'),
+    ('FAILED', 'FAILED'),
+)
+
+class Task(BaseModel):
+    name = models.CharField(max_length=255)  # dotted path to callable
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+
+    status = models.CharField(max_length=10, choices=TASK_STATUS_CHOICES, default='PENDING')
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+
+    locked_by = models.CharField(max_length=64, null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"{self.name} [{self.status}]"
+
+    class Meta:
+        ordering = ['run_at']
+        indexes = [
+            models.Index(fields=['status', 'run_at']),
+        ]
@@ -0,0 +1,109 @@
+import uuid
+import traceback
+from datetime import timedelta
+
+from django.conf                import settings
+from django.db                  import connection, transaction
+from django.db.models           import F
+from django.utils               import timezone
+from django.utils.module_loading import import_string
+
+from apps.tasks.models import Task
+
+
+def task_name(func):
+    if isinstance(func, str):
+        return func
+    return f"{func.__module__}.{func.__qualname__}"
+
+
+def enqueue(func, *args, run_at=None, max_attempts=3, **kwargs):
+    """
+    Ставит вызов в очередь: enqueue(send_email, user_id, subject="Hi").
+    func — функция уровня модуля или ее dotted path, args/kwargs должны сериализоваться в JSON.
+    """
+    return Task.objects.create(
+        name=task_name(func),
+        args=list(args),
+        kwargs=kwargs,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts,
+    )
+
+
+def claim(limit, worker_id, names=None):
+    """
+    Забирает до `limit` готовых задач (только с именами из `names`, если заданы).
+    На PostgreSQL/MySQL строки блокируются через SKIP LOCKED, на SQLite защищает
+    условный UPDATE по status='PENDING'.
+    """
+    now = timezone.now()
+    token = f"{worker_id}:{uuid.uuid4().hex[:8]}"
+    with transaction.atomic():
+        queryset = Task.objects.filter(status='PENDING', run_at__lte=now).order_by('run_at')
+        if names is not None:
+            queryset = queryset.filter(name__in=names)
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        ids = list(queryset.values_list('id', flat=True)[:limit])
+        if not ids:
+            return []
+        Task.objects.filter(id__in=ids, status='PENDING').update(
+            status='RUNNING', locked_by=token, started_at=now, attempts=F('attempts') + 1,
+        )
+    return list(Task.objects.filter(locked_by=token, status='RUNNING'))
+
+
+def execute(name, args, kwargs):
+    """ Runs in the pool (thread or process) """
+    from django.db import close_old_connections
+
+    try:
+        return import_string(name)(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def complete(task):
+    Task.objects.filter(id=task.id).update(status='SUCCESS', finished_at=timezone.now(), last_error='')
+
+
+def fail(task, exc):
+    error = ''.join(traceback.format_exception(exc))
+    if task.attempts < task.max_attempts:
+        backoff = getattr(settings, 'TASKS_RETRY_BACKOFF', 10) * 2 ** (task.attempts - 1)
+        Task.objects.filter(id=task.id).update(
+            status='PENDING', locked_by=None, run_at=timezone.now() + timedelta(seconds=backoff), last_error=error,
+        )
+    else:
+        Task.objects.filter(id=task.id).update(status='FAILED', finished_at=timezone.now(), last_error=error)
+
+
+def requeue_stale(timeout):
+    """ Возвращает в очередь задачи упавших воркеров """
+    started_before = timezone.now() - timedelta(seconds=timeout)
+    return Task.objects.filter(status='RUNNING', started_at__lt=started_before).update(status='PENDING', locked_by=None)
+
+
+def purge_finished(retention):
+    """ Удаляет SUCCESS/FAILED задачи, завершенные больше `retention` секунд назад """
+    finished_before = timezone.now() - timedelta(seconds=retention)
+    deleted, _ = Task.objects.filter(status__in=['SUCCESS', 'FAILED'], finished_at__lt=finished_before).delete()
+    return deleted
+
+
+def ensure_scheduled():
+    """
+    Periodic jobs from settings.TASKS_SCHEDULE: [(name, args, interval_seconds), ...].
+    Keeps one pending run per job, the next run is planned `interval` seconds ahead.
+    """
+    schedule = getattr(settings, 'TASKS_SCHEDULE', [])
+    if not schedule:
+        return
+    queued = Task.objects.filter(
+        name__in=[name for name, _, _ in schedule], status__in=['PENDING', 'RUNNING'],
+    ).values_list('name', 'args')
+    queued = {(name, tuple(args)) for name, args in queued}
+    for name, args, interval in schedule:
+        if (name, tuple(args)) not in queued:
+            enqueue(name, *args, run_at=timezone.now() + timedelta(seconds=interval))
@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+from django.test    import TestCase, override_settings
+from django.utils   import timezone
+
+from apps.tasks         import queue
+from apps.tasks.models  import Task
+from apps.tasks.worker  import Worker
+
+
+def add(a, b):
+    return a + b
+
+
+def boom():
+    raise ValueError("boom")
+
+
+ADD = __name__ + '.add'
+BOOM = __name__ + '.boom'
+
+
+class ClaimTests(TestCase):
+    def test_claims_ready_tasks_once(self):
+        ready = queue.enqueue(add, 1, 2)
+        queue.enqueue(add, 3, 4, run_at=timezone.now() + timedelta(hours=1))
+
+        claimed = queue.claim(10, 'w1')
+        self.assertEqual([task.id for task in claimed], [ready.id])
+        self.assertEqual(claimed[0].status, 'RUNNING')
+        self.assertEqual(claimed[0].attempts, 1)
+        self.assertTrue(claimed[0].locked_by.startswith('w1:'))
+        self.assertEqual(queue.claim(10, 'w2'), [])
+
+    def test_claim_respects_limit_and_order(self):
+        now = timezone.now()
+        tasks = [queue.enqueue(add, i, i, run_at=now - timedelta(seconds=10 - i)) for i in range(3)]
+        self.assertEqual([task.id for task in queue.claim(2, 'w1')], [tasks[0].id, tasks[1].id])
+
+    def test_claim_filters_by_name(self):
+        queue.enqueue(boom)
+        wanted = queue.enqueue(add, 1, 1)
+        self.assertEqual([task.id for task in queue.claim(10, 'w1', names=[ADD])], [wanted.id])
+        self.assertEqual(Task.objects.get(name=BOOM).status, 'PENDING')
+
+
+@override_settings(TASKS_RETRY_BACKOFF=10)
+class RetryTests(TestCase):
+    def test_failed_attempt_is_rescheduled_with_backoff(self):
+        queue.enqueue(boom, max_attempts=3)
+        for attempt, backoff in ((1, 10), (2, 20)):
+            task, = queue.claim(1, 'w1')
+            self.assertEqual(task.attempts, attempt)
+            before = timezone.now()
+            queue.fail(task, ValueError("boom"))
+            task.refresh_from_db()
+            self.assertEqual(task.status, 'PENDING')
+            self.assertIsNone(task.locked_by)
+            self.assertIn('ValueError', task.last_error)
+            self.assertGreaterEqual(task.run_at, before + timedelta(seconds=backoff))
+            self.assertLess(task.run_at, before + timedelta(seconds=backoff + 5))
+            Task.objects.filter(id=task.id).update(run_at=timezone.now())
+
+        task, = queue.claim(1, 'w1')
+        queue.fail(task, ValueError("boom"))
+        task.refresh_from_db()
+        self.assertEqual(task.status, 'FAILED')
+        self.assertIsNotNone(task.finished_at)
+
+    def test_worker_runs_and_retries(self):
+        ok = queue.enqueue(add, 2, 3)
+        bad = queue.enqueue(boom, max_attempts=1)
+        worker = Worker(concurrency=2, poll_interval=0.01, names=[ADD, BOOM])
+        worker.run(burst=True)
+
+        self.assertEqual((worker.processed, worker.failed), (1, 1))
+        self.assertEqual(Task.objects.get(id=ok.id).status, 'SUCCESS')
+        self.assertEqual(Task.objects.get(id=bad.id).status, 'FAILED')
+
+
+class MaintenanceTests(TestCase):
+    def test_requeue_stale(self):
+        stale = queue.enqueue(add, 1, 1)
+        fresh = queue.enqueue(add, 2, 2)
+        queue.claim(10, 'w1')
+        Task.objects.filter(id=stale.id).update(started_at=timezone.now() - timedelta(minutes=20))
+
+        self.assertEqual(queue.requeue_stale(600), 1)
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((stale.status, stale.locked_by), ('PENDING', None))
+        self.assertEqual(fresh.status, 'RUNNING')
+
+    def test_purge_finished(self):
+        old = timezone.now() - timedelta(days=8)
+        done = [queue.enqueue(add, i, i) for i in range(4)]
+        Task.objects.filter(id__in=[done[0].id, done[1].id]).update(status='SUCCESS', finished_at=old)
+        Task.objects.filter(id=done[2].id).update(status='FAILED', finished_at=old)
+        Task.objects.filter(id=done[3].id).update(status='SUCCESS', finished_at=timezone.now())
+
+        self.assertEqual(queue.purge_finished(7 * 24 * 60 * 60), 3)
+        self.assertEqual(list(Task.objects.values_list('id', flat=True)), [done[3].id])
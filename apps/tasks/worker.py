@@ -0,0 +1,79 @@
+import os
+import time
+import socket
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import django
+from django.conf    import settings
+from django.db      import connections
+
+from apps.tasks import queue
+
+
+class Worker:
+    """
+    Цикл воркера: забирает задачи пачками по числу свободных слотов пула,
+    результаты записывает из основного потока (одно соединение с БД).
+    """
+
+    def __init__(self, concurrency=4, pool='thread', poll_interval=1.0, stale_after=600, names=None, log=None):
+        """ names: run only tasks with these names (benchmarks, tests) """
+        self.concurrency = concurrency
+        self.pool = pool
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.names = names
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.log = log or (lambda message: None)
+        self.processed = 0
+        self.failed = 0
+
+    def make_executor(self):
+        if self.pool == 'process':
+            # spawn: дочерним процессам не достаются открытые соединения родителя
+            connections.close_all()
+            return ProcessPoolExecutor(
+                max_workers=self.concurrency,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup,
+            )
+        return ThreadPoolExecutor(max_workers=self.concurrency)
+
+    def run(self, burst=False):
+        """ burst=True: exit once the queue is empty (benchmarks, tests, cron) """
+        running = {}
+        last_maintenance = 0
+        with self.make_executor() as executor:
+            while True:
+                if time.monotonic() - last_maintenance > 60:
+                    queue.requeue_stale(self.stale_after)
+                    queue.purge_finished(getattr(settings, 'TASKS_RETENTION', 7 * 24 * 60 * 60))
+                    queue.ensure_scheduled()
+                    last_maintenance = time.monotonic()
+
+                free_slots = self.concurrency - len(running)
+                tasks = queue.claim(free_slots, self.worker_id, self.names) if free_slots else []
+                for task in tasks:
+                    future = executor.submit(queue.execute, task.name, task.args, task.kwargs)
+                    running[future] = task
+
+                if not running:
+                    if burst:
+                        return
+                    time.sleep(self.poll_interval)
+                    continue
+
+                done, _ = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.finish(running.pop(future), future)
+
+    def finish(self, task, future):
+        exc = future.exception()
+        if exc is None:
+            queue.complete(task)
+            self.processed += 1
+        else:
+            queue.fail(task, exc)
+            self.failed += 1
+            self.log(f"Task {task.name} ({task.id}) failed on attempt {task.attempts}: {exc!r}")
@@ -13,3 +13,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_asgi_application()
+
+# фоновый сброс счетчиков просмотров — только в процессах, которые обслуживают запросы
+from apps.shop.counters import view_counter  # noqa: E402
+
+view_counter.serve()
@@ -51,9 +51,13 @@ INSTALLED_APPS = [
     'apps.profiles',
     'apps.sellers',
     'apps.shop',
+    'apps.tasks',
 ]
 
 MIDDLEWARE = [
+    'apps.common.middleware.MetricsMiddleware',
+    'apps.common.middleware.ProfilingMiddleware',
+    'apps.common.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -127,6 +131,103 @@ USE_I18N = True
 USE_TZ = True
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Для нескольких воркеров нужен общий backend (Redis/Memcached/DB), иначе лимиты считаются на процесс
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
+# Idempotency-Key: блокировка и сохраненные ответы должны быть видны всем воркерам, поэтому отдельный алиас.
+# LocMem/Dummy отклоняются проверкой common.E002; для DatabaseCache нужен `manage.py createcachetable`
+CACHES['idempotency'] = {
+    'BACKEND': config('IDEMPOTENCY_CACHE_BACKEND', default='django.core.cache.backends.db.DatabaseCache'),
+    'LOCATION': config('IDEMPOTENCY_CACHE_LOCATION', default='idempotency_cache'),
+}
+if CACHES['idempotency']['BACKEND'] == 'django.core.cache.backends.db.DatabaseCache':
+    # при превышении MAX_ENTRIES (по умолчанию 300) DatabaseCache удалил бы и блокировки выполняющихся запросов
+    CACHES['idempotency']['OPTIONS'] = {'MAX_ENTRIES': 10 ** 6}
+
+# Корзина гостя — подписанная cookie, сливается в корзину пользователя при логине
+GUEST_CART_MAX_AGE = 60 * 60 * 24 * 30
+GUEST_CART_MAX_ITEMS = 50
+
+# Кэш карточек товаров (ProductView, пакетный /shop/products/batch/), 0 — выключен
+PRODUCT_CACHE_TIMEOUT = 5 * 60
+
+# Сжатие ответов (apps.common.compression): порядок предпочтения кодеков (br/zstd — если установлены
+# пакеты brotli/zstandard), уровни и минимальный размер тела
+COMPRESSION_ENCODINGS = ['zstd', 'br', 'gzip']
+COMPRESSION_LEVELS = {'gzip': 6, 'br': 5, 'zstd': 3}
+COMPRESSION_MIN_SIZE = 1024
+
+# Подсказки поиска (apps.shop.autocomplete): индекс в памяти процесса, полная пересборка раз в N секунд
+AUTOCOMPLETE_REBUILD_INTERVAL = 10 * 60
+
+# Idempotency-Key (checkout, корзина): сколько хранить первый ответ, время блокировки
+# выполняющегося запроса и сколько параллельный дубль ждет его результата
+IDEMPOTENCY_TTL = 60 * 60 * 24
+IDEMPOTENCY_LOCK_TIMEOUT = 30
+IDEMPOTENCY_WAIT = 10
+
+# Список категорий со статистикой товаров, сбрасывается сигналами при записи Product/Category
+CATEGORY_CACHE_TIMEOUT = 60 * 60
+
+# Лента /shop/changes/ не отдает изменения моложе N секунд: незакоммиченные транзакции с более ранним updated_at
+CATALOG_CHANGES_LAG = 5
+
+# "Customers also bought": сколько соседей хранить на товар
+RECOMMENDATIONS_TOP_K = 10
+
+# ordering=trending: период полураспада популярности товара
+TRENDING_HALF_LIFE_HOURS = 72
+
+# Счетчики просмотров товаров: буфер в памяти процесса, сброс пачкой
+VIEW_COUNTER_FLUSH_INTERVAL = 10
+VIEW_COUNTER_MAX_PENDING = 1000
+
+
+# Background tasks: `manage.py run_worker`
+# Периодические задачи: (dotted path, args, interval в секундах)
+
+TASKS_RETRY_BACKOFF = 10
+
+TASKS_SCHEDULE = [
+    ('django.core.management.call_command', ['flush_carts'], 5 * 60),
+    ('django.core.management.call_command', ['archive_deleted'], 24 * 60 * 60),
+    ('django.core.management.call_command', ['refresh_recommendations'], 60 * 60),
+    ('django.core.management.call_command', ['build_snapshot'], 2 * 60),
+]
+
+# Сколько секунд хранить завершенные (SUCCESS/FAILED) задачи, чистит воркер
+TASKS_RETENTION = 7 * 24 * 60 * 60
+
+# Через сколько дней soft-deleted строки переносятся в ArchivedRecord
+ARCHIVE_RETENTION_DAYS = 30
+
+
+# Profiling: cProfile dumps per view, report via `manage.py profile_report`
+
+PROFILING_ENABLED = config('PROFILING_ENABLED', default=False, cast=bool)
+PROFILING_SAMPLE_RATE = config('PROFILING_SAMPLE_RATE', default=0.01, cast=float)
+PROFILING_DIR = config('PROFILING_DIR', default=str(BASE_DIR / 'profiles'))
+PROFILING_MAX_FILES = 200
+
+
+# Metrics: per-route counters in mmap'd files shared by all workers, exposed at /metrics
+
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_DIR = config('METRICS_DIR', default=str(BASE_DIR / 'metrics'))
+METRICS_MAX_ROUTES = 256
+# /metrics отдает латентность и трафик по маршрутам: без токена эндпоинт отвечает 404,
+# scraper передает `Authorization: Bearer <METRICS_TOKEN>`
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.1/howto/static-files/
 
@@ -147,10 +248,16 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 2,
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
+        'apps.common.throttling.AnonTokenBucketThrottle',
+        'apps.common.throttling.UserTokenBucketThrottle',
+        'apps.common.throttling.ScopedTokenBucketThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '300/hour',
+        'user': '3000/hour',
+        'catalog': '120/minute',
+        'checkout': '10/minute',
+        'register': '5/minute',
     }
 }
 
@@ -163,6 +270,17 @@ SPECTACULAR_SETTINGS = {
     },
 }
 
+# Скомпилированная схема (`manage.py build_schema`), отдается /api/schema/
+SCHEMA_DIR = BASE_DIR / 'schema'
+
+# Снимок каталога для анонимных запросов (`manage.py build_snapshot`, apps.shop.snapshot).
+# Пересобирается по расписанию и через SNAPSHOT_REBUILD_DELAY секунд после записи в каталог,
+# снимок старше SNAPSHOT_MAX_AGE секунд не используется
+SNAPSHOT_ENABLED = config('SNAPSHOT_ENABLED', default=True, cast=bool)
+SNAPSHOT_PATH = BASE_DIR / 'snapshot' / 'catalog.snap'
+SNAPSHOT_MAX_AGE = 5 * 60
+SNAPSHOT_REBUILD_DELAY = 10
+
 SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
@@ -0,0 +1,32 @@
+"""
+Production profile: DJANGO_SETTINGS_MODULE=core.settings_prod
+
+Leaves out dev-only apps (django_extensions, admin). Views get DRF's own AutoSchema, so
+drf_spectacular.openapi is not imported by ordinary requests: Swagger views are imported
+on the first /api/docs/ hit, the schema is built by `manage.py build_schema` in a separate
+process with SCHEMA_BUILD_SETTINGS.
+Boot cost can be compared with `manage.py importtime --settings-module core.settings_prod`.
+"""
+
+from decouple import config, Csv
+
+from core.settings import *  # noqa: F401,F403
+from core.settings import INSTALLED_APPS, REST_FRAMEWORK
+
+
+DEBUG = False
+
+ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='localhost', cast=Csv())
+
+DEV_ONLY_APPS = [
+    'django.contrib.admin',
+    'django_extensions',
+]
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in DEV_ONLY_APPS]
+
+# drf_spectacular.openapi (+plumbing, extensions) импортировался бы при первом создании view
+REST_FRAMEWORK = {**REST_FRAMEWORK, 'DEFAULT_SCHEMA_CLASS': 'rest_framework.schemas.openapi.AutoSchema'}
+
+# Профиль, в котором строится OpenAPI-схема (apps.common.schema): нужен AutoSchema drf_spectacular
+SCHEMA_BUILD_SETTINGS = 'core.settings'
@@ -1,14 +1,19 @@
-from django.contrib import admin
+from django.conf import settings
 from django.urls import path, include
 
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from apps.common.views import metrics_view, schema_view, lazy_view
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/docs/', SpectacularSwaggerView.as_view(url_name="schema"), name='swagger-ui'),
+    path('metrics', metrics_view, name='metrics'),
+    path('api/schema/', schema_view, name='schema'),
+    path('api/docs/', lazy_view('drf_spectacular.views.SpectacularSwaggerView', url_name="schema"), name='swagger-ui'),
     path('auth/', include('apps.accounts.urls')),
     path('profiles/', include('apps.profiles.urls')),
     path("sellers/", include("apps.sellers.urls")),
     path('shop/', include("apps.shop.urls")),
-]
\ No newline at end of file
+]
+
+if 'django.contrib.admin' in settings.INSTALLED_APPS:
+    from django.contrib import admin
+
+    urlpatterns.insert(0, path('admin/', admin.site.urls))
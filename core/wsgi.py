@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# фоновый сброс счетчиков просмотров — только в процессах, которые обслуживают запросы
+from apps.shop.counters import view_counter  # noqa: E402
+
+view_counter.serve()